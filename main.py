@@ -1,37 +1,124 @@
-#Nicholas Latham
-
-import mypl_error as error 
-import mypl_lexer as lexer 
-import mypl_token as token 
-import mypl_parser as parser 
-import mypl_ast as ast 
-import mypl_type_checker as type_checker 
-import mypl_interpreter as interpreter 
-import sys
-
-def main(filename): 
-    try: 
-        file_stream = open(filename, 'r') 
-        hw6(file_stream) 
-        file_stream.close() 
-    except FileNotFoundError: 
-        sys.exit('invalid filename %s' % filename) 
-    except error.MyPLError as e: 
-        file_stream.close() 
-        sys.exit(e)
-        
-def main(file_stream): 
-    the_lexer = lexer.Lexer(file_stream) 
-    the_parser = parser.Parser(the_lexer) 
-    stmt_list = the_parser.parse() 
-    the_type_checker = type_checker.TypeChecker() 
-    stmt_list.accept(the_type_checker) 
-    the_interpreter = interpreter.Interpreter() 
-    the_interpreter.run(stmt_list)
-    
-if __name__ == '__main__': 
-    if len(sys.argv) != 2: 
-        sys.exit('Usage: %s file' % sys.argv[0]) 
-    main(sys.argv[1])
-
-    
+#Nicholas Latham
+
+import mypl_error as error 
+import mypl_lexer as lexer 
+import mypl_parallel_lexer as parallel_lexer 
+import mypl_token as token 
+import mypl_parser as parser 
+import mypl_ast as ast 
+import mypl_type_checker as type_checker 
+import mypl_interpreter as interpreter 
+import mypl_closures as closures 
+import mypl_bytecode as bytecode 
+import mypl_vm as vm 
+import mypl_transpiler as transpiler 
+import mypl_jit as jit 
+import mypl_resolver as resolver 
+import mypl_optimizer as optimizer 
+import mypl_cache as cache 
+import argparse
+import sys
+
+# execution engines, each class having a run(stmt_list) method 
+ENGINES = { 
+    'tree': interpreter.Interpreter, 
+    'closure': closures.ClosureInterpreter, 
+    'vm': vm.VM, 
+    'python': transpiler.TranspilingInterpreter, 
+    'jit': jit.JitInterpreter, 
+} 
+
+def main(filename, mapped=False, jobs=1, use_cache=True, engine='tree', disassemble=False, 
+         python_file=None, eager=False, gc_stats=False, level=1): 
+    file_stream = None 
+    try: 
+        the_cache = None 
+        if use_cache and cache.enabled(): 
+            the_cache = cache.ProgramCache() 
+            with open(filename, 'rb') as f: 
+                key = the_cache.key(f.read(), 'text' if jobs == 1 and not mapped else 'bytes', level, eager) 
+            stmt_list = the_cache.load(key) 
+            if stmt_list is not None: 
+                execute(stmt_list, engine, disassemble, python_file, eager, gc_stats) 
+                return 
+        if jobs != 1: 
+            stmt_list = check(parallel_lexer.open_parallel(filename, jobs), level, eager) 
+        elif mapped: 
+            stmt_list = check(lexer.open_mapped(filename), level, eager) 
+        else: 
+            file_stream = open(filename, 'r') 
+            stmt_list = check(lexer.BufferedLexer(file_stream), level, eager) 
+            file_stream.close() 
+        if the_cache is not None: 
+            the_cache.store(key, stmt_list) 
+        execute(stmt_list, engine, disassemble, python_file, eager, gc_stats) 
+    except FileNotFoundError: 
+        sys.exit('invalid filename %s' % filename) 
+    except error.MyPLError as e: 
+        if file_stream is not None: 
+            file_stream.close() 
+        sys.exit(e)
+        
+def hw6(file_stream): 
+    run(lexer.BufferedLexer(file_stream))
+
+def run(the_lexer): 
+    execute(check(the_lexer))
+
+def check(the_lexer, level=1, eager=False): 
+    """parses, type checks, optimizes (at level, for engines running with
+    eager, see mypl_optimizer) and resolves the program, returns its StmtList""" 
+    the_parser = parser.Parser(the_lexer) 
+    stmt_list = the_parser.parse() 
+    the_type_checker = type_checker.TypeChecker() 
+    stmt_list.accept(the_type_checker) 
+    optimizer.optimize(stmt_list, level, eager=eager) 
+    return resolver.resolve(stmt_list) 
+
+def execute(stmt_list, engine='tree', disassemble=False, python_file=None, eager=False, gc_stats=False): 
+    if disassemble: 
+        print(bytecode.disassemble(bytecode.compile(stmt_list, eager))) 
+        return 
+    if python_file is not None: 
+        with open(python_file, 'w') as f: 
+            f.write(transpiler.transpile(stmt_list, eager)) 
+        return 
+    the_interpreter = ENGINES[engine](eager) 
+    the_interpreter.run(stmt_list)
+    if gc_stats: 
+        print(the_interpreter.heap_stats.report(), file=sys.stderr)
+    
+if __name__ == '__main__': 
+    arg_parser = argparse.ArgumentParser(description='Runs a MyPL program') 
+    arg_parser.add_argument('file') 
+    arg_parser.add_argument('--mmap', action='store_true', 
+                            help='lex the file from a read-only memory map instead of reading it into memory') 
+    arg_parser.add_argument('-j', '--jobs', type=int, default=1, 
+                            help='lex in line-aligned chunks on this many processes (0 for one per core)') 
+    arg_parser.add_argument('--no-cache', action='store_true', 
+                            help='always compile the file, without reading or writing the .myplc cache (also MYPL_NO_CACHE=1)') 
+    arg_parser.add_argument('--engine', choices=sorted(ENGINES), default='tree', 
+                            help='run the program by walking the tree, compiled to Python closures, compiled to bytecode, ' 
+                                 'translated to Python, or walking the tree and compiling hot loops and functions ' 
+                                 '(MYPL_JIT_STATS=1 prints its counters)') 
+    arg_parser.add_argument('--disassemble', action='store_true', 
+                            help='print the bytecode the program compiles to instead of running it') 
+    arg_parser.add_argument('--transpile', metavar='PYFILE', 
+                            help='write the program translated to a Python module to PYFILE instead of running it ' 
+                                 '(run it with mypl_runtime.py importable)') 
+    arg_parser.add_argument('--eager', action='store_true', 
+                            help='always evaluate both sides of and/or, as older versions did, instead of ' 
+                                 'stopping once the left side decides the result') 
+    arg_parser.add_argument('-O', dest='level', type=int, choices=range(len(optimizer.LEVELS)), default=1, 
+                            help='optimization level: 0 runs the program as written, 1 folds constants, prunes ' 
+                                 'literal branches and drops unreachable code, 2 also drops unused variables ' 
+                                 '(default 1)') 
+    arg_parser.add_argument('--gc-stats', action='store_true', 
+                            help='print the structs allocated, live and freed and the garbage collections ' 
+                                 'made while running to stderr') 
+    args = arg_parser.parse_args() 
+    main(args.file, mapped=args.mmap, jobs=args.jobs, use_cache=not args.no_cache, engine=args.engine, 
+         disassemble=args.disassemble, python_file=args.transpile, eager=args.eager, 
+         gc_stats=args.gc_stats, level=args.level)
+
+    
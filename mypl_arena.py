@@ -0,0 +1,197 @@
+import mypl_token as token
+import mypl_ast as ast
+import array
+
+# field types
+NODE = 0 # a node (or None)
+TOKEN = 1 # a Token (or None)
+NODES = 2 # a list of nodes
+TOKENS = 3 # a list of Tokens
+FLAG = 4 # a bool
+NAME = 5 # a string such as a type name (or None)
+INT = 6 # a small non-negative int such as a frame slot (or None)
+CONSTANTS = 7 # a program's constant pool (or None), kept in Arena.constants
+INTS = 8 # a list of small non-negative ints such as field indices (or None)
+
+# every node class with its fields, in a fixed order giving each class a
+# small integer kind code
+NODE_FIELDS = (
+    (ast.StmtList, (('stmts', NODES), ('frame_size', INT), ('scope_start', INT), ('scope_end', INT),
+                    ('constants', CONSTANTS), ('scalar_replaced_sites', INT))),
+    (ast.ExprStmt, (('expr', NODE),)),
+    (ast.VarDeclStmt, (('var_id', TOKEN), ('var_type', TOKEN), ('var_expr', NODE), ('slot', INT))),
+    (ast.AssignStmt, (('lhs', NODE), ('rhs', NODE))),
+    (ast.StructDeclStmt, (('struct_id', TOKEN), ('var_decls', NODES), ('slot', INT), ('frame_size', INT))),
+    (ast.FunDeclStmt, (('fun_name', TOKEN), ('params', NODES), ('return_type', TOKEN), ('stmt_list', NODE),
+                       ('slot', INT), ('frame_size', INT))),
+    (ast.ReturnStmt, (('return_expr', NODE), ('return_token', TOKEN), ('tail_call', FLAG))),
+    (ast.WhileStmt, (('bool_expr', NODE), ('stmt_list', NODE))),
+    (ast.IfStmt, (('if_part', NODE), ('elseifs', NODES), ('has_else', FLAG), ('else_stmts', NODE))),
+    (ast.SimpleExpr, (('term', NODE), ('inferred_type', NAME))),
+    (ast.ComplexExpr, (('first_operand', NODE), ('math_rel', TOKEN), ('rest', NODE), ('inferred_type', NAME),
+                       ('op', INT))),
+    (ast.BoolExpr, (('first_expr', NODE), ('bool_rel', TOKEN), ('second_expr', NODE),
+                    ('bool_connector', TOKEN), ('rest', NODE), ('negated', FLAG), ('op', INT))),
+    (ast.LValue, (('path', TOKENS), ('depth', INT), ('slot', INT), ('fields', INTS))),
+    (ast.FunParam, (('param_name', TOKEN), ('param_type', TOKEN), ('slot', INT))),
+    (ast.BasicIf, (('bool_expr', NODE), ('stmt_list', NODE))),
+    (ast.SimpleRValue, (('val', TOKEN), ('inferred_type', NAME), ('depth', INT), ('slot', INT),
+                        ('const', INT))),
+    (ast.NewRValue, (('struct_type', TOKEN), ('inferred_type', NAME), ('depth', INT), ('slot', INT))),
+    (ast.CallRValue, (('fun', TOKEN), ('args', NODES), ('inferred_type', NAME), ('depth', INT), ('slot', INT))),
+    (ast.IDRvalue, (('path', TOKENS), ('inferred_type', NAME), ('depth', INT), ('slot', INT), ('fields', INTS))),
+)
+CLASSES = tuple(cls for cls, fields in NODE_FIELDS)
+KIND_CODES = {cls: code for code, cls in enumerate(CLASSES)}
+FIELDS = tuple(fields for cls, fields in NODE_FIELDS)
+# (kind code, field name) -> position of the field in the node's slots
+FIELD_SLOTS = {(code, name): i for code, fields in enumerate(FIELDS)
+               for i, (name, field_type) in enumerate(fields)}
+
+class Arena(object):
+    """A whole AST flattened into arrays. Node i has kind code kinds[i] and
+    its fields in slots[offsets[i]:], one slot per field: the index of a
+    child node, the index of a token in the tokens TokenBuffer (whose
+    lexeme table holds each distinct lexeme once), the index of a string
+    in names, 0/1 for a flag, an int, 0 for the program's constant pool
+    (kept as the list constants), or -1 for None. A
+    list field's slot points into lists, at its length followed by its
+    items (node or token indices, or the ints themselves). Nodes are numbered in preorder, so node 0 is the root and every
+    child comes after its parent.
+
+    Use encode and decode to convert from and to node objects, or walk the
+    arrays directly with kind, field, items and lexeme."""
+
+    def __init__(self):
+        self.kinds = array.array('B')
+        self.offsets = array.array('I')
+        self.slots = array.array('i')
+        self.lists = array.array('i')
+        self.tokens = token.TokenBuffer()
+        self.names = [] # distinct NAME field values
+        self.constants = None # the root's constant pool
+        self.name_index = {} # name -> position in names
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, i):
+        """the node class of node i"""
+        return CLASSES[self.kinds[i]]
+
+    def field(self, i, name):
+        """the slot value of field name of node i"""
+        return self.slots[self.offsets[i] + FIELD_SLOTS[self.kinds[i], name]]
+
+    def items(self, i, name):
+        """the node or token indices (or ints) in list field name of node i"""
+        start = self.field(i, name) + 1
+        return self.lists[start:start + self.lists[start - 1]]
+
+    def token(self, t):
+        return self.tokens.token(t)
+
+    def lexeme(self, t):
+        return self.tokens.lexemes[self.tokens.lexeme_ids[t]]
+
+
+def encode(root):
+    """Returns an Arena holding the AST under root (usually a StmtList
+    from the parser), checked or not."""
+    arena = Arena()
+    slots = arena.slots
+    lists = arena.lists
+    # (node, array and position to store its index in), without recursing
+    # so long expression chains can be encoded
+    pending = [(root, None, 0)]
+    while pending:
+        node, parent_array, position = pending.pop()
+        i = len(arena.kinds)
+        if parent_array is not None:
+            parent_array[position] = i
+        code = KIND_CODES[type(node)]
+        arena.kinds.append(code)
+        arena.offsets.append(len(slots))
+        children = []
+        for name, field_type in FIELDS[code]:
+            value = getattr(node, name)
+            if field_type == FLAG:
+                slots.append(1 if value else 0)
+            elif field_type == INT:
+                slots.append(-1 if value is None else value)
+            elif value is None:
+                slots.append(-1)
+            elif field_type == NODE:
+                children.append((value, slots, len(slots)))
+                slots.append(-1)
+            elif field_type == TOKEN:
+                slots.append(_add_token(arena, value))
+            elif field_type == NAME:
+                slots.append(_add_name(arena, value))
+            elif field_type == CONSTANTS:
+                arena.constants = value
+                slots.append(0)
+            else:
+                slots.append(len(lists))
+                lists.append(len(value))
+                for item in value:
+                    if field_type == NODES:
+                        children.append((item, lists, len(lists)))
+                        lists.append(-1)
+                    elif field_type == INTS:
+                        lists.append(item)
+                    else:
+                        lists.append(_add_token(arena, item))
+        children.reverse()
+        pending.extend(children)
+    return arena
+
+def decode(arena):
+    """Returns the node objects for the AST in arena (the root node)"""
+    nodes = [None] * len(arena)
+    tokens = arena.tokens
+    # children come after their parents, so build from the last node back
+    for i in range(len(arena) - 1, -1, -1):
+        code = arena.kinds[i]
+        cls = CLASSES[code]
+        node = cls.__new__(cls)
+        slot = arena.offsets[i]
+        for name, field_type in FIELDS[code]:
+            value = arena.slots[slot]
+            slot += 1
+            if field_type == FLAG:
+                value = value == 1
+            elif field_type == INT:
+                value = value if value >= 0 else None
+            elif field_type == NODE:
+                value = nodes[value] if value >= 0 else None
+            elif field_type == TOKEN:
+                value = tokens.token(value) if value >= 0 else None
+            elif field_type == NAME:
+                value = arena.names[value] if value >= 0 else None
+            elif field_type == CONSTANTS:
+                value = arena.constants if value >= 0 else None
+            else:
+                start = value + 1
+                indices = arena.lists[start:start + arena.lists[value]]
+                if field_type == NODES:
+                    value = [nodes[j] for j in indices]
+                elif field_type == INTS:
+                    value = tuple(indices)
+                else:
+                    value = [tokens.token(j) for j in indices]
+            setattr(node, name, value)
+        nodes[i] = node
+    return nodes[0]
+
+def _add_token(arena, the_token):
+    arena.tokens.append(the_token)
+    return len(arena.tokens) - 1
+
+def _add_name(arena, name):
+    position = arena.name_index.get(name)
+    if position is None:
+        position = len(arena.names)
+        arena.names.append(name)
+        arena.name_index[name] = position
+    return position
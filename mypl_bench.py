@@ -0,0 +1,407 @@
+#Benchmarks for the MyPL implementation
+#usage: python mypl_bench.py <benchmark> [size]
+
+import mypl_token as token
+import mypl_lexer as lexer
+import mypl_parallel_lexer as parallel_lexer
+import mypl_parser as parser
+import mypl_type_checker as type_checker
+import mypl_cache as cache
+import mypl_interpreter as interpreter
+import mypl_closures as closures
+import mypl_vm as vm
+import mypl_transpiler as transpiler
+import mypl_jit as jit
+import mypl_arena as arena
+import mypl_ast as ast
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# a chunk of typical MyPL code, repeated to build large inputs
+SAMPLE = '''# linked list helpers
+struct Node
+  var val = 0;
+  var next: Node = nil;
+end
+
+fun int sum_list(head: Node)
+  var total = 0;
+  var p = head;
+  while p != nil do
+    set total = total + p.val;
+    set p = p.next;
+  end
+  return total;
+end
+
+var i = 0;
+var msg = "counting up";
+while i < 100 and not i == 50 do
+  if i % 2 == 0 then
+    set i = i + 1;
+  elif i >= 75 then
+    set i = i + 2;
+  else
+    set i = i + 3;
+  end
+end
+print(msg + itos(i) + ftos(3.25 * 2.0));
+'''
+
+def generate_source(copies):
+    return SAMPLE * copies
+
+def time_lexer(make_lexer, source):
+    """Returns (number of tokens, seconds) for lexing source with the lexer
+    make_lexer(source) returns."""
+    start = time.perf_counter()
+    the_lexer = make_lexer(source)
+    count = 1
+    while the_lexer.next_token().tokentype != token.EOS:
+        count += 1
+    return count, time.perf_counter() - start
+
+def bench_lexer(size):
+    source = generate_source(size)
+    print('lexing %i characters' % len(source))
+    lexers = [
+        ('Lexer', lambda text: lexer.Lexer(io.StringIO(text))),
+        ('BufferedLexer', lambda text: lexer.BufferedLexer(io.StringIO(text))),
+        ('MappedLexer', lambda text: lexer.MappedLexer(text.encode('utf-8'))),
+    ]
+    results = []
+    for name, make_lexer in lexers:
+        count, seconds = time_lexer(make_lexer, source)
+        results.append(seconds)
+        print('%-14s %9i tokens %8.3fs %12.0f tokens/s %6.1fx' % (name, count, seconds, count / seconds, results[0] / seconds))
+
+def peak_lexer_memory(make_lexer):
+    """Returns the peak Python heap use (in bytes) of lexing with the lexer
+    make_lexer() returns, without keeping the tokens."""
+    tracemalloc.start()
+    the_lexer = make_lexer()
+    while the_lexer.next_token().tokentype != token.EOS:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def bench_mmap(size):
+    for copies in [size, size * 4, size * 16]:
+        fd, filename = tempfile.mkstemp(suffix='.mypl')
+        with os.fdopen(fd, 'w') as f:
+            f.write(generate_source(copies))
+        def text_lexer():
+            with open(filename, 'r') as f:
+                return lexer.BufferedLexer(f)
+        text_peak = peak_lexer_memory(text_lexer)
+        mapped_peak = peak_lexer_memory(lambda: lexer.open_mapped(filename))
+        print('%10i bytes: text %10i bytes peak, mmap %8i bytes peak' % (os.path.getsize(filename), text_peak, mapped_peak))
+        os.remove(filename)
+
+def bench_parallel(size):
+    source = generate_source(size)
+    fd, filename = tempfile.mkstemp(suffix='.mypl')
+    with os.fdopen(fd, 'w') as f:
+        f.write(source)
+    print('lexing %i characters on %i cores' % (len(source), os.cpu_count()))
+    count, base = time_lexer(lambda text: lexer.BufferedLexer(io.StringIO(text)), source)
+    print('%-14s %9i tokens %8.3fs %12.0f tokens/s' % ('BufferedLexer', count, base, count / base))
+    for jobs in [1, 2, 4, 8]:
+        count, seconds = time_lexer(lambda text: parallel_lexer.open_parallel(filename, jobs), source)
+        print('%-14s %9i tokens %8.3fs %12.0f tokens/s %6.1fx' % ('jobs=%i' % jobs, count, seconds, count / seconds, base / seconds))
+    os.remove(filename)
+
+def bench_tokens(size):
+    source = generate_source(size)
+    tracemalloc.start()
+    the_lexer = lexer.BufferedLexer(io.StringIO(source))
+    before = tracemalloc.get_traced_memory()[0]
+    tokens = []
+    while not tokens or tokens[-1].tokentype != token.EOS:
+        tokens.append(the_lexer.next_token())
+    per_token = (tracemalloc.get_traced_memory()[0] - before) / len(tokens)
+    del tokens
+    the_lexer = lexer.BufferedLexer(io.StringIO(source))
+    before = tracemalloc.get_traced_memory()[0]
+    buffer = lexer.tokenize(the_lexer)
+    per_buffered = (tracemalloc.get_traced_memory()[0] - before) / len(buffer)
+    tracemalloc.stop()
+    print('%i tokens: %.1f bytes/token as Token objects, %.1f bytes/token in a TokenBuffer' % (len(buffer), per_token, per_buffered))
+    start = time.perf_counter()
+    parser.Parser(lexer.BufferLexer(buffer)).parse()
+    print('parsed in %.3fs' % (time.perf_counter() - start))
+
+def bench_parse(size):
+    sources = [
+        ('statements', lambda n: 'var x = 1;\n' * n),
+        ('expression terms', lambda n: 'var x = ' + ' + '.join(['x'] * n) + ';'),
+        ('and terms', lambda n: 'while ' + ' and '.join(['x < 1'] * n) + ' do end'),
+    ]
+    for name, make_source in sources:
+        for n in [size, size * 10]:
+            buffer = lexer.tokenize(lexer.BufferedLexer(io.StringIO(make_source(n))))
+            start = time.perf_counter()
+            parser.Parser(lexer.BufferLexer(buffer)).parse()
+            seconds = time.perf_counter() - start
+            print('%9i %-16s %8.3fs %12.0f tokens/s' % (n, name, seconds, len(buffer) / seconds))
+
+def bench_ast(size):
+    # nodes per copy of SAMPLE, not counting the root StmtList
+    per_copy = len(arena.encode(parser.Parser(lexer.BufferedLexer(io.StringIO(SAMPLE))).parse())) - 1
+    copies = -(-size // per_copy)
+    buffer = lexer.tokenize(lexer.BufferedLexer(io.StringIO(generate_source(copies))))
+    tracemalloc.start()
+    start = time.perf_counter()
+    stmt_list = parser.Parser(lexer.BufferLexer(buffer)).parse()
+    parse_seconds = time.perf_counter() - start
+    tree_bytes = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    the_arena = arena.encode(stmt_list)
+    encode_seconds = time.perf_counter() - start
+    arena_bytes = tracemalloc.get_traced_memory()[0] - tree_bytes
+    tracemalloc.stop()
+    nodes = len(the_arena)
+    print('%i nodes' % nodes)
+    print('objects %10i bytes %6.1f bytes/node  parsed in %.3fs' % (tree_bytes, tree_bytes / nodes, parse_seconds))
+    print('arena   %10i bytes %6.1f bytes/node  encoded in %.3fs' % (arena_bytes, arena_bytes / nodes, encode_seconds))
+    # walking the arena needs no node objects, e.g. counting the calls
+    start = time.perf_counter()
+    calls = the_arena.kinds.count(arena.KIND_CODES[ast.CallRValue])
+    print('%i calls counted in %.4fs' % (calls, time.perf_counter() - start))
+
+def nested_loop_source(depth, size):
+    """a loop reading and writing variables declared depth blocks out"""
+    lines = ['var total = 0;', 'var step = 1;']
+    lines += ['if true then'] * depth
+    lines += ['var i = 0;', 'while i < %i do' % size, 'set total = total + step;',
+              'set i = i + 1;', 'end']
+    lines += ['end'] * depth
+    return '\n'.join(lines) + '\n'
+
+def time_program(source, make_interpreter=interpreter.Interpreter):
+    """Returns the seconds spent running the checked program source"""
+    stmt_list = parser.Parser(lexer.BufferedLexer(io.StringIO(source))).parse()
+    stmt_list.accept(type_checker.TypeChecker())
+    start = time.perf_counter()
+    make_interpreter().run(stmt_list)
+    return time.perf_counter() - start
+
+def bench_scopes(size):
+    for depth in [0, 4, 16, 64]:
+        seconds = time_program(nested_loop_source(depth, size))
+        print('%3i blocks deep: %8.3fs %10.0f iterations/s' % (depth, seconds, size / seconds))
+
+WHILE_BODIES = [
+    ('no declarations', 'set total = total + i;'),
+    ('one declaration', 'var x = i * 2;\nset total = total + x;'),
+    ('if with declaration', 'if i % 2 == 0 then\nvar x = i;\nset total = total + x;\nelse\nset total = total + 1;\nend'),
+]
+
+def bench_while(size):
+    for name, body in WHILE_BODIES:
+        source = 'var total = 0;\nvar i = 0;\nwhile i < %i do\n%s\nset i = i + 1;\nend\n' % (size, body)
+        seconds = time_program(source)
+        print('%-20s %8.3fs %10.0f iterations/s' % (name, seconds, size / seconds))
+
+FIB_SOURCE = '''fun int fib(n: int)
+if n < 2 then
+return n;
+end
+return fib(n - 1) + fib(n - 2);
+end
+var total = 0;
+var i = 0;
+while i < %i do
+set total = total + fib(10);
+set i = i + 1;
+end
+'''
+
+ENGINES = [('tree', interpreter.Interpreter), ('closure', closures.ClosureInterpreter), ('vm', vm.VM),
+           ('python', transpiler.TranspilingInterpreter), ('jit', jit.JitInterpreter)]
+
+def bench_engines(size):
+    programs = [(name, 'var total = 0;\nvar i = 0;\nwhile i < %i do\n%s\nset i = i + 1;\nend\n' % (size, body))
+                for name, body in WHILE_BODIES]
+    programs.append(('fib(10) calls', FIB_SOURCE % (size // 200)))
+    for name, source in programs:
+        times = [time_program(source, make_interpreter) for engine, make_interpreter in ENGINES]
+        print('%-20s' % name + ''.join(' %8s %7.3fs %4.1fx' % (engine, seconds, times[0] / seconds)
+                                       for (engine, _), seconds in zip(ENGINES, times)))
+
+# call-heavy programs: (name, source taking the number of loop iterations,
+# calls made per iteration)
+CALL_PROGRAMS = [
+    ('fib(10)', FIB_SOURCE, 177),
+    ('leaf function', '''fun int add(a: int, b: int)
+return a + b;
+end
+var total = 0;
+var i = 0;
+while i < %i do
+set total = add(total, i);
+set i = i + 1;
+end
+''', 1),
+    ('return from a loop', '''fun int find(n: int)
+var j = 0;
+while true do
+if j == n then
+return j;
+end
+set j = j + 1;
+end
+return 0;
+end
+var total = 0;
+var i = 0;
+while i < %i do
+set total = total + find(2);
+set i = i + 1;
+end
+''', 1),
+    ('no return', '''fun nil touch(n: int)
+var x = n;
+end
+var i = 0;
+while i < %i do
+touch(i);
+set i = i + 1;
+end
+''', 1),
+    ('tail recursion', '''fun int sum(n: int, acc: int)
+if n == 0 then
+return acc;
+end
+return sum(n - 1, acc + n);
+end
+var total = 0;
+var i = 0;
+while i < %i do
+set total = total + sum(100, 0);
+set i = i + 1;
+end
+''', 101),
+]
+
+def bench_calls(size):
+    """Times each engine on the call-heavy programs, making about size
+    calls, and prints the time per call (loop included)"""
+    for name, source, calls in CALL_PROGRAMS:
+        iterations = max(1, size // calls)
+        times = [time_program(source % iterations, make_interpreter) for engine, make_interpreter in ENGINES]
+        print('%-20s' % name + ''.join(' %8s %7.2fus' % (engine, seconds * 1e6 / (iterations * calls))
+                                       for (engine, _), seconds in zip(ENGINES, times)))
+
+# struct-heavy programs: (name, source taking the number of loop iterations)
+STRUCT_PROGRAMS = [
+    ('build a list', '''struct Node
+var val = 0;
+var next: Node = nil;
+end
+var head: Node = nil;
+var i = 0;
+while i < %i do
+var n = new Node;
+set n.val = i;
+set n.next = head;
+set head = n;
+set i = i + 1;
+end
+'''),
+    ('read and write a.b.c', '''struct Inner
+var val = 0;
+end
+struct Outer
+var inner = new Inner;
+end
+var o = new Outer;
+var total = 0;
+var i = 0;
+while i < %i do
+set o.inner.val = i;
+set total = total + o.inner.val;
+set i = i + 1;
+end
+'''),
+    ('temporary in a call', '''struct Pair
+var a = 0;
+var b = 0;
+end
+fun int sum(x: int, y: int)
+var p = new Pair;
+set p.a = x;
+set p.b = y;
+return p.a + p.b;
+end
+var total = 0;
+var i = 0;
+while i < %i do
+set total = total + sum(i, 1);
+set i = i + 1;
+end
+'''),
+]
+
+def peak_program_memory(source, make_interpreter):
+    """Returns the peak Python heap use (in bytes) of running the checked
+    program source"""
+    stmt_list = parser.Parser(lexer.BufferedLexer(io.StringIO(source))).parse()
+    stmt_list.accept(type_checker.TypeChecker())
+    tracemalloc.start()
+    make_interpreter().run(stmt_list)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def bench_structs(size):
+    """Times each engine on the struct programs, printing the time and the
+    peak memory per loop iteration"""
+    for name, source in STRUCT_PROGRAMS:
+        times = [time_program(source % size, make_interpreter) for engine, make_interpreter in ENGINES]
+        peaks = [peak_program_memory(source % size, make_interpreter) for engine, make_interpreter in ENGINES]
+        print('%-20s' % name + ''.join(' %8s %6.2fus %5iB' % (engine, seconds * 1e6 / size, peak / size)
+                                       for (engine, _), seconds, peak in zip(ENGINES, times, peaks)))
+
+def bench_cache(size):
+    source = generate_source(size)
+    start = time.perf_counter()
+    stmt_list = parser.Parser(lexer.BufferedLexer(io.StringIO(source))).parse()
+    stmt_list.accept(type_checker.TypeChecker())
+    compile_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        the_cache = cache.ProgramCache(directory)
+        key = the_cache.key(source.encode('utf-8'))
+        the_cache.store(key, stmt_list)
+        start = time.perf_counter()
+        the_cache.load(the_cache.key(source.encode('utf-8')))
+        load_seconds = time.perf_counter() - start
+        print('%i characters: compile %.3fs, cache hit %.3fs (%i byte entry) %6.1fx' % (len(source), compile_seconds, load_seconds, os.path.getsize(the_cache.path(key)), compile_seconds / load_seconds))
+
+BENCHMARKS = {
+    'ast': (bench_ast, 1000000),
+    'cache': (bench_cache, 200),
+    'calls': (bench_calls, 50000),
+    'engines': (bench_engines, 50000),
+    'lexer': (bench_lexer, 200),
+    'mmap': (bench_mmap, 50),
+    'parallel': (bench_parallel, 2000),
+    'parse': (bench_parse, 10000),
+    'scopes': (bench_scopes, 20000),
+    'structs': (bench_structs, 100000),
+    'while': (bench_while, 50000),
+    'tokens': (bench_tokens, 500),
+}
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit('Usage: %s (%s) [size]' % (sys.argv[0], '|'.join(sorted(BENCHMARKS))))
+    bench, size = BENCHMARKS[sys.argv[1]]
+    if len(sys.argv) > 2:
+        size = int(sys.argv[2])
+    bench(size)
@@ -0,0 +1,50 @@
+import mypl_token as token
+import mypl_runtime as runtime
+
+class BuiltIn(object):
+    """A built-in function: the types of its parameters and of its result,
+    as the type checker names value types (token.INTVAL, token.FLOATVAL,
+    token.BOOLVAL, token.STRINGVAL, or token.NIL for no value), and the
+    Python function computing it. A located function is passed the line
+    and column to report errors at after the argument values, those of
+    resolver.error_token in every engine."""
+    __slots__ = ('name', 'params', 'result', 'function', 'located')
+
+    def __init__(self, name, params, result, function, located=False):
+        self.name = name
+        self.params = tuple(params)
+        self.result = result
+        self.function = function
+        self.located = located
+
+    @property
+    def arity(self):
+        return len(self.params)
+
+
+# name -> BuiltIn, read by the type checker and every engine
+BUILT_INS = {}
+
+def register(name, params, result, function, located=False):
+    """Makes function the built-in function name of programs checked and
+    run from now on, replacing any built-in of that name. Errors should
+    be raised as MyPLErrors, at the line and column passed to a located
+    function."""
+    BUILT_INS[name] = BuiltIn(name, params, result, function, located)
+    return BUILT_INS[name]
+
+def lookup(name):
+    """The BuiltIn called name, or None"""
+    return BUILT_INS.get(name)
+
+register('print', [token.STRINGVAL], token.NIL, runtime.print_)
+register('length', [token.STRINGVAL], token.INTVAL, len)
+register('get', [token.INTVAL, token.STRINGVAL], token.STRINGVAL, runtime.get, located=True)
+register('readi', [], token.INTVAL, runtime.readi, located=True)
+register('reads', [], token.STRINGVAL, runtime.reads)
+register('readf', [], token.FLOATVAL, runtime.readf)
+register('itof', [token.INTVAL], token.FLOATVAL, runtime.itof, located=True)
+register('itos', [token.INTVAL], token.STRINGVAL, runtime.itos, located=True)
+register('ftos', [token.FLOATVAL], token.STRINGVAL, str)
+register('stoi', [token.STRINGVAL], token.INTVAL, int)
+register('stof', [token.STRINGVAL], token.FLOATVAL, float)
@@ -0,0 +1,335 @@
+import mypl_ast as ast
+import mypl_resolver as resolver
+import mypl_optimizer as optimizer
+import mypl_operators as operators
+import mypl_builtins as builtins
+import array
+
+# opcodes, each instruction being an opcode and one int argument
+OPNAMES = ('CONST', 'LOAD', 'STORE', 'LOAD_OUTER', 'STORE_OUTER', 'LOAD_FAR',
+           'STORE_FAR', 'POP', 'GET_FIELD', 'SET_FIELD', 'ADD', 'SUB', 'MUL',
+           'DIV', 'IDIV', 'MOD', 'LT', 'LE', 'GT', 'GE', 'EQ', 'NE', 'TRUTH', 'NOT',
+           'AND', 'OR', 'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_FALSE_OR_POP',
+           'JUMP_IF_TRUE_OR_POP', 'CLEAR', 'CALL', 'TAIL_CALL', 'BUILTIN', 'RETURN',
+           'MAKE_CLOSURE', 'MAKE_STRUCT', 'NEW')
+(CONST, LOAD, STORE, LOAD_OUTER, STORE_OUTER, LOAD_FAR, STORE_FAR, POP,
+ GET_FIELD, SET_FIELD, ADD, SUB, MUL, DIV, IDIV, MOD, LT, LE, GT, GE, EQ, NE, TRUTH,
+ NOT, AND, OR, JUMP, JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP,
+ CLEAR, CALL, TAIL_CALL, BUILTIN, RETURN, MAKE_CLOSURE, MAKE_STRUCT, NEW) = range(len(OPNAMES))
+
+# mypl_operators operation -> opcode; IDIV divides ints
+OPERATION_OPCODES = {operators.ADD: ADD, operators.CONCAT: ADD, operators.SUB: SUB,
+                     operators.MUL: MUL, operators.DIV: DIV, operators.INT_DIV: IDIV,
+                     operators.MOD: MOD, operators.LT: LT, operators.LE: LE,
+                     operators.GT: GT, operators.GE: GE, operators.EQ: EQ,
+                     operators.NE: NE}
+
+class Code(object):
+    """The bytecode of the program, a function or a struct's field
+    initializers. Instruction i is ops[i] applied to args[i]; an argument
+    is a frame slot, a jump target, an argument count, a struct field
+    index, or an index into constants (values, nested Code objects and
+    other operands). A struct's Code has a template: the field values its
+    literal initializers give, and the frame they give the others (see
+    resolver.struct_template)."""
+    __slots__ = ('name', 'ops', 'args', 'constants', 'frame_size', 'params', 'template')
+
+    def __init__(self, name, frame_size, params=()):
+        self.name = name
+        self.ops = array.array('B')
+        self.args = array.array('i')
+        self.constants = []
+        self.frame_size = frame_size
+        self.params = params # slots the arguments are stored in
+        self.template = None # (field values, frame) of a struct
+
+    def __len__(self):
+        return len(self.ops)
+
+
+class Compiler(ast.Visitor):
+    """Compiles a checked, resolved program into Code objects for the
+    stack machine in mypl_vm. Variables keep the frame slots the resolver
+    gave them. Functions and structs compile into Code objects of their
+    own: a call pushes the function value and its arguments and runs
+    CALL. new pushes the struct value and runs NEW, which copies the
+    struct's template, or if some initializers are not literals calls
+    the struct's Code to run them, the Code ending in MAKE_STRUCT. A tail
+    call (see mypl_resolver) runs TAIL_CALL instead, which replaces the
+    returning function's frame."""
+
+    def __init__(self, code, literals, eager=False):
+        self.code = code
+        # the program's constant pool
+        self.literals = literals
+        # whether both sides of and/or are always evaluated
+        self.eager = eager
+        # optimizer.constant_key(value) -> position in code.constants, for
+        # literals
+        self.constant_index = {}
+
+    def emit(self, op, arg=0):
+        """Appends an instruction, returning its position"""
+        self.code.ops.append(op)
+        self.code.args.append(arg)
+        return len(self.code.ops) - 1
+
+    def patch(self, position):
+        """Points the jump at position to the next instruction"""
+        self.code.args[position] = len(self.code.ops)
+
+    def constant(self, value):
+        """Returns the index of value in the constant pool"""
+        key = optimizer.constant_key(value) if isinstance(value, (int, float, str, type(None))) else None
+        if key is not None and key in self.constant_index:
+            return self.constant_index[key]
+        self.code.constants.append(value)
+        if key is not None:
+            self.constant_index[key] = len(self.code.constants) - 1
+        return len(self.code.constants) - 1
+
+    def load(self, depth, slot):
+        if slot is None:
+            self.emit(CONST, self.constant(None))
+        elif depth == 0:
+            self.emit(LOAD, slot)
+        elif depth == 1:
+            self.emit(LOAD_OUTER, slot)
+        else:
+            self.emit(LOAD_FAR, self.constant((depth, slot)))
+
+    def store(self, depth, slot):
+        if slot is None:
+            self.emit(POP)
+        elif depth == 0:
+            self.emit(STORE, slot)
+        elif depth == 1:
+            self.emit(STORE_OUTER, slot)
+        else:
+            self.emit(STORE_FAR, self.constant((depth, slot)))
+
+    def leave(self, stmt_list):
+        # clear the slots of the variables the block declared
+        if stmt_list.scope_start is not None:
+            start, end = stmt_list.scope_start, stmt_list.scope_end
+            self.emit(CLEAR, self.constant((start, end, [None] * (end - start))))
+
+    def visit_stmt_list(self, stmt_list):
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+
+    def visit_expr_stmt(self, expr_stmt):
+        expr_stmt.expr.accept(self)
+        self.emit(POP)
+
+    def visit_var_decl_stmt(self, var_decl):
+        var_decl.var_expr.accept(self)
+        self.store(0, var_decl.slot)
+
+    def visit_assign_stmt(self, assign_stmt):
+        assign_stmt.rhs.accept(self)
+        assign_stmt.lhs.accept(self)
+
+    def visit_lvalue(self, lval):
+        if len(lval.path) == 1:
+            self.store(lval.depth, lval.slot)
+            return
+        self.load(lval.depth, lval.slot)
+        for i in lval.fields[:-1]:
+            self.emit(GET_FIELD, i)
+        self.emit(SET_FIELD, lval.fields[-1])
+
+    def visit_struct_decl_stmt(self, struct_decl):
+        code = Code(struct_decl.struct_id.lexeme, struct_decl.frame_size)
+        values, frame, initializers = resolver.struct_template(struct_decl, self.literals)
+        code.template = (values, frame)
+        if initializers:
+            compiler = Compiler(code, self.literals, self.eager)
+            for i, var_decl in initializers:
+                var_decl.accept(compiler)
+            # (field index, slot of its value) of the fields set
+            fields = tuple((i, var_decl.slot) for i, var_decl in initializers)
+            compiler.emit(MAKE_STRUCT, compiler.constant(fields))
+            compiler.emit(RETURN)
+        self.emit(MAKE_CLOSURE, self.constant(code))
+        self.store(0, struct_decl.slot)
+
+    def visit_fun_decl_stmt(self, fun_decl):
+        code = Code(fun_decl.fun_name.lexeme, fun_decl.frame_size, tuple(x.slot for x in fun_decl.params))
+        compiler = Compiler(code, self.literals, self.eager)
+        fun_decl.stmt_list.accept(compiler)
+        # a function running off its end returns nil, in every engine
+        compiler.emit(CONST, compiler.constant(None))
+        compiler.emit(RETURN)
+        self.emit(MAKE_CLOSURE, self.constant(code))
+        self.store(0, fun_decl.slot)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.tail_call:
+            self.call(return_stmt.return_expr.term, TAIL_CALL)
+            return
+        if return_stmt.return_expr != None:
+            return_stmt.return_expr.accept(self)
+        else:
+            self.emit(CONST, self.constant(None))
+        self.emit(RETURN)
+
+    def visit_while_stmt(self, while_stmt):
+        top = len(self.code)
+        while_stmt.bool_expr.accept(self)
+        exit_jump = self.emit(JUMP_IF_FALSE)
+        while_stmt.stmt_list.accept(self)
+        self.emit(JUMP, top)
+        self.patch(exit_jump)
+        self.leave(while_stmt.stmt_list)
+
+    def visit_if_stmt(self, if_stmt):
+        end_jumps = []
+        basic_ifs = [if_stmt.if_part] + if_stmt.elseifs
+        for basic_if in basic_ifs:
+            basic_if.bool_expr.accept(self)
+            next_jump = self.emit(JUMP_IF_FALSE)
+            basic_if.stmt_list.accept(self)
+            self.leave(basic_if.stmt_list)
+            # the last branch falls through to the end
+            if basic_if is not basic_ifs[-1] or if_stmt.has_else:
+                end_jumps.append(self.emit(JUMP))
+            self.patch(next_jump)
+        if if_stmt.has_else:
+            if_stmt.else_stmts.accept(self)
+            self.leave(if_stmt.else_stmts)
+        for position in end_jumps:
+            self.patch(position)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        # a - b - c is a - (b - c): push the operands, then apply the
+        # operators innermost first
+        opcodes = []
+        while isinstance(complex_expr, ast.ComplexExpr):
+            complex_expr.first_operand.accept(self)
+            opcodes.append(OPERATION_OPCODES[complex_expr.op])
+            complex_expr = complex_expr.rest
+        complex_expr.accept(self)
+        for opcode in reversed(opcodes):
+            self.emit(opcode)
+
+    def visit_bool_expr(self, bool_expr):
+        if not self.eager:
+            self.__short_circuit(bool_expr)
+            return
+        # both sides of and/or are evaluated before the connectors
+        opcodes = []
+        while True:
+            bool_expr.first_expr.accept(self)
+            if bool_expr.bool_rel != None:
+                bool_expr.second_expr.accept(self)
+                self.emit(OPERATION_OPCODES[bool_expr.op])
+            else:
+                self.emit(TRUTH)
+            if bool_expr.negated:
+                self.emit(NOT)
+            if bool_expr.bool_connector == None:
+                break
+            opcodes.append(AND if bool_expr.bool_connector.lexeme == 'and' else OR)
+            bool_expr = bool_expr.rest
+        for opcode in reversed(opcodes):
+            self.emit(opcode)
+
+    def __short_circuit(self, bool_expr):
+        # a and b or c is a and (b or c), so a term deciding its connector
+        # decides the whole expression: its jump goes to the end
+        jumps = []
+        while True:
+            bool_expr.first_expr.accept(self)
+            if bool_expr.bool_rel != None:
+                bool_expr.second_expr.accept(self)
+                self.emit(OPERATION_OPCODES[bool_expr.op])
+            else:
+                self.emit(TRUTH)
+            if bool_expr.negated:
+                self.emit(NOT)
+            if bool_expr.bool_connector == None:
+                break
+            if bool_expr.bool_connector.lexeme == 'and':
+                jumps.append(self.emit(JUMP_IF_FALSE_OR_POP))
+            else:
+                jumps.append(self.emit(JUMP_IF_TRUE_OR_POP))
+            bool_expr = bool_expr.rest
+        for position in jumps:
+            self.patch(position)
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.const is None:
+            self.load(simple_rvalue.depth, simple_rvalue.slot)
+        else:
+            self.emit(CONST, self.constant(self.literals[simple_rvalue.const]))
+
+    def visit_new_rvalue(self, new_rvalue):
+        self.load(new_rvalue.depth, new_rvalue.slot)
+        self.emit(NEW, 0)
+
+    def visit_call_rvalue(self, call_rvalue):
+        name = call_rvalue.fun.lexeme
+        built_in = builtins.BUILT_INS.get(name)
+        if built_in is not None:
+            for arg in call_rvalue.args:
+                arg.accept(self)
+            # a located built-in is passed where to report errors too
+            extra = ()
+            if built_in.located:
+                the_token = resolver.error_token(call_rvalue)
+                extra = (the_token.line, the_token.column)
+            operand = (name, len(call_rvalue.args), built_in.function, extra)
+            self.emit(BUILTIN, self.constant(operand))
+            return
+        self.call(call_rvalue, CALL)
+
+    def call(self, call_rvalue, opcode):
+        """Emits a call of a MyPL function with CALL or TAIL_CALL"""
+        self.load(call_rvalue.depth, call_rvalue.slot)
+        for arg in call_rvalue.args:
+            arg.accept(self)
+        self.emit(opcode, len(call_rvalue.args))
+
+    def visit_id_rvalue(self, id_rvalue):
+        self.load(id_rvalue.depth, id_rvalue.slot)
+        for i in id_rvalue.fields or ():
+            self.emit(GET_FIELD, i)
+
+
+def compile(stmt_list, eager=False):
+    """Returns the Code for the checked program stmt_list, evaluating both
+    sides of and/or if eager"""
+    resolver.resolve(stmt_list)
+    code = Code('<program>', stmt_list.frame_size)
+    compiler = Compiler(code, stmt_list.constants, eager)
+    stmt_list.accept(compiler)
+    compiler.emit(CONST, compiler.constant(None))
+    compiler.emit(RETURN)
+    return code
+
+def disassemble(code):
+    """Returns a listing of code and of the Code objects it makes"""
+    lines = ['%s (%i slots):' % (code.name, code.frame_size)]
+    if code.template is not None:
+        lines.append('%6s template %r' % ('', code.template[0]))
+    nested = []
+    for i, (op, arg) in enumerate(zip(code.ops, code.args)):
+        line = '%6i %-20s %i' % (i, OPNAMES[op], arg)
+        if op == CLEAR:
+            line += ' (slots %i to %i)' % code.constants[arg][:2]
+        elif op in (CONST, LOAD_FAR, STORE_FAR, MAKE_STRUCT):
+            line += ' (%r)' % (code.constants[arg],)
+        elif op == BUILTIN:
+            line += ' (%s/%i)' % code.constants[arg][:2]
+        elif op == MAKE_CLOSURE:
+            line += ' (%s)' % code.constants[arg].name
+            nested.append(code.constants[arg])
+        lines.append(line)
+    for inner in nested:
+        lines.append('')
+        lines.append(disassemble(inner))
+    return '\n'.join(lines)
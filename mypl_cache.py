@@ -0,0 +1,117 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+# bump whenever the AST classes, the parser, the type checker or the
+# optimizer change in a way that makes previously cached programs invalid
+VERSION = 12
+
+# default size bound for the cache directory, in bytes
+MAX_BYTES = 64 * 1024 * 1024
+
+SUFFIX = '.myplc'
+
+class ProgramCache(object):
+    """An on-disk cache of type-checked programs (pickled ASTs) in .myplc
+    files named by a hash of the source, the lexing mode, the optimization
+    level (and eager flag) it was optimized for and VERSION.
+
+    Entries are written to a temporary file and renamed into place, so
+    concurrent writers never leave a partial entry behind and readers only
+    see complete ones. Hits refresh an entry's modification time, and once
+    the directory grows past max_bytes the least recently used entries are
+    removed. A cache that can't be read or written is a miss, never an
+    error."""
+
+    def __init__(self, directory=None, max_bytes=MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+
+    def key(self, source, mode='text', level=0, eager=False):
+        """Returns the cache key for the source bytes lexed in mode and
+        optimized at level for engines running with eager"""
+        digest = hashlib.sha256()
+        digest.update(('mypl %i %s -O%i%s\n' % (VERSION, mode, level, ' eager' if eager else '')).encode('ascii'))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key):
+        """Returns the cached StmtList for key, or None"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                stmt_list = pickle.load(f)
+        except Exception:
+            # missing, unreadable or from an incompatible build
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return stmt_list
+
+    def store(self, key, stmt_list):
+        """Saves stmt_list under key, returns False if it couldn't be"""
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(stmt_list, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path(key))
+        except (OSError, pickle.PicklingError, RecursionError):
+            # very deeply nested expressions can't be pickled
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in
+        max_bytes"""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, name))
+            total += info.st_size
+        entries.sort()
+        for mtime, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+def default_directory():
+    """$MYPL_CACHE_DIR, or mypl under the user's cache directory"""
+    directory = os.environ.get('MYPL_CACHE_DIR')
+    if directory:
+        return directory
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'mypl')
+
+def enabled():
+    """False when the cache is switched off with MYPL_NO_CACHE=1"""
+    return os.environ.get('MYPL_NO_CACHE', '') in ('', '0')
@@ -0,0 +1,360 @@
+import mypl_ast as ast
+import mypl_error as error
+import mypl_resolver as resolver
+import mypl_operators as operators
+import mypl_builtins as builtins
+import mypl_runtime as runtime
+
+class ClosureInterpreter(object):
+    """Runs a checked program by first compiling it into nested Python
+    closures, one per AST node, which are then called with the current
+    frame (see mypl_resolver). An expression closure returns its value.
+    A statement closure returns None, or a 1-tuple holding the value of a
+    return statement that ended the function, or for a tail call (see
+    mypl_resolver) a (body, frame) pair the function's caller runs in its
+    place, so tail recursion takes no Python stack. Operators, constants and
+    variable slots are looked up once, at compile time, instead of on
+    every evaluation. Programs behave as they do with Interpreter, and
+    eager is as for Interpreter."""
+
+    def __init__(self, eager=False):
+        self.eager = eager
+        # the program's constant pool
+        self.constants = None
+        # struct allocation and garbage collection counters
+        self.heap_stats = runtime.HeapStats()
+
+    def run(self, stmt_list):
+        program = self.compile(stmt_list)
+        self.heap_stats.scalar_replaced_sites = stmt_list.scalar_replaced_sites
+        with self.heap_stats:
+            program()
+
+    def compile(self, stmt_list):
+        """Returns a function that runs the program stmt_list"""
+        resolver.resolve(stmt_list)
+        self.constants = stmt_list.constants
+        body = self.__block(stmt_list)
+        size = stmt_list.frame_size
+        def program():
+            body([None] * size)
+        return program
+
+    # statements
+
+    def __block(self, stmt_list):
+        stmts = tuple(self.__stmt(stmt) for stmt in stmt_list.stmts)
+        if len(stmts) == 1:
+            return stmts[0]
+        def block(frame):
+            for stmt in stmts:
+                result = stmt(frame)
+                if result is not None:
+                    return result
+        return block
+
+    def __leave(self, stmt_list):
+        """Returns a function clearing the slots stmt_list declares, or
+        None if it declares nothing"""
+        if stmt_list.scope_start is None:
+            return None
+        start, end = stmt_list.scope_start, stmt_list.scope_end
+        nones = [None] * (end - start)
+        def leave(frame):
+            frame[start:end] = nones
+        return leave
+
+    def __stmt(self, stmt):
+        if isinstance(stmt, ast.VarDeclStmt):
+            return self.__var_decl(stmt)
+        if isinstance(stmt, ast.AssignStmt):
+            return self.__assign(stmt)
+        if isinstance(stmt, ast.ExprStmt):
+            return self.__stmt_of(self.__expr(stmt.expr))
+        if isinstance(stmt, ast.WhileStmt):
+            return self.__while(stmt)
+        if isinstance(stmt, ast.IfStmt):
+            return self.__if(stmt)
+        if isinstance(stmt, ast.ReturnStmt):
+            if stmt.tail_call:
+                return self.__call(stmt.return_expr.term, True)
+            if stmt.return_expr is None:
+                return lambda frame: (None,)
+            expr = self.__expr(stmt.return_expr)
+            return lambda frame: (expr(frame),)
+        if isinstance(stmt, ast.FunDeclStmt):
+            return self.__fun_decl(stmt)
+        if isinstance(stmt, ast.StructDeclStmt):
+            return self.__struct_decl(stmt)
+        raise error.MyPLError('cannot compile ' + type(stmt).__name__, 0, 0)
+
+    def __stmt_of(self, expr):
+        # evaluates expr for its effects, discarding the value
+        def expr_stmt(frame):
+            expr(frame)
+        return expr_stmt
+
+    def __var_decl(self, var_decl):
+        expr = self.__expr(var_decl.var_expr)
+        slot = var_decl.slot
+        def var_decl_stmt(frame):
+            frame[slot] = expr(frame)
+        return var_decl_stmt
+
+    def __assign(self, assign_stmt):
+        expr = self.__expr(assign_stmt.rhs)
+        lval = assign_stmt.lhs
+        slot, depth = lval.slot, lval.depth
+        if len(lval.path) == 1:
+            if slot is None:
+                return self.__stmt_of(expr)
+            if depth == 0:
+                def assign_local(frame):
+                    frame[slot] = expr(frame)
+                return assign_local
+            def assign(frame):
+                value = expr(frame)
+                _frame(frame, depth)[slot] = value
+            return assign
+        get = self.__var(lval)
+        fields = lval.fields[:-1]
+        last = lval.fields[-1]
+        if not fields:
+            def assign_field(frame):
+                value = expr(frame)
+                get(frame)[last] = value
+            return assign_field
+        def assign_path(frame):
+            value = expr(frame)
+            obj = get(frame)
+            for i in fields:
+                obj = obj[i]
+            obj[last] = value
+        return assign_path
+
+    def __while(self, while_stmt):
+        cond = self.__bool(while_stmt.bool_expr)
+        body = self.__block(while_stmt.stmt_list)
+        leave = self.__leave(while_stmt.stmt_list)
+        def while_stmt(frame):
+            while cond(frame):
+                result = body(frame)
+                if result is not None:
+                    return result
+            if leave is not None:
+                leave(frame)
+        return while_stmt
+
+    def __if(self, if_stmt):
+        branches = tuple((self.__bool(x.bool_expr), self.__block(x.stmt_list), self.__leave(x.stmt_list))
+                         for x in [if_stmt.if_part] + if_stmt.elseifs)
+        if if_stmt.has_else:
+            else_body = self.__block(if_stmt.else_stmts)
+            else_leave = self.__leave(if_stmt.else_stmts)
+        else:
+            else_body = else_leave = None
+        if len(branches) == 1 and else_body is None:
+            cond, body, leave = branches[0]
+            def if_then(frame):
+                if cond(frame):
+                    result = body(frame)
+                    if result is None and leave is not None:
+                        leave(frame)
+                    return result
+            return if_then
+        def if_stmt(frame):
+            for cond, body, leave in branches:
+                if cond(frame):
+                    result = body(frame)
+                    if result is None and leave is not None:
+                        leave(frame)
+                    return result
+            if else_body is not None:
+                result = else_body(frame)
+                if result is None and else_leave is not None:
+                    else_leave(frame)
+                return result
+        return if_stmt
+
+    def __fun_decl(self, fun_decl):
+        slot = fun_decl.slot
+        # (frame size, parameter slots, body), bound to the declaring frame
+        # when the declaration runs
+        function = (fun_decl.frame_size, tuple(x.slot for x in fun_decl.params),
+                    self.__block(fun_decl.stmt_list))
+        def fun_decl_stmt(frame):
+            frame[slot] = (frame, function)
+        return fun_decl_stmt
+
+    def __struct_decl(self, struct_decl):
+        slot = struct_decl.slot
+        # the fields literals give, copied by new, and the other initializers
+        values, frame, initializers = resolver.struct_template(struct_decl, self.constants)
+        fields = tuple((i, x.slot, self.__expr(x.var_expr)) for i, x in initializers)
+        struct = (values, frame, fields)
+        def struct_decl_stmt(frame):
+            frame[slot] = (frame, struct)
+        return struct_decl_stmt
+
+    # expressions
+
+    def __expr(self, expr):
+        if isinstance(expr, ast.ComplexExpr):
+            first = self.__rvalue(expr.first_operand)
+            rest = self.__expr(expr.rest)
+            op = operators.OPERATIONS[expr.op]
+            literal = constant(expr.rest, self.constants)
+            if literal is not None:
+                value = literal[0]
+                return lambda frame: op(first(frame), value)
+            return lambda frame: op(first(frame), rest(frame))
+        return self.__rvalue(expr.term)
+
+    def __rvalue(self, rvalue):
+        if isinstance(rvalue, ast.SimpleRValue):
+            literal = constant(rvalue, self.constants)
+            if literal is not None:
+                value = literal[0]
+                return lambda frame: value
+            return self.__var(rvalue)
+        if isinstance(rvalue, ast.IDRvalue):
+            get = self.__var(rvalue)
+            if len(rvalue.path) == 1:
+                return get
+            fields = rvalue.fields
+            if len(fields) == 1:
+                i = fields[0]
+                return lambda frame: get(frame)[i]
+            def id_rvalue(frame):
+                value = get(frame)
+                for i in fields:
+                    value = value[i]
+                return value
+            return id_rvalue
+        if isinstance(rvalue, ast.NewRValue):
+            return self.__new(rvalue)
+        return self.__call(rvalue)
+
+    def __var(self, node):
+        """Returns a function reading the variable node was resolved to"""
+        slot, depth = node.slot, node.depth
+        if slot is None:
+            return lambda frame: None
+        if depth == 0:
+            return lambda frame: frame[slot]
+        if depth == 1:
+            return lambda frame: frame[0][slot]
+        return lambda frame: _frame(frame, depth)[slot]
+
+    def __new(self, new_rvalue):
+        get = self.__var(new_rvalue)
+        Struct = runtime.Struct
+        allocate = self.heap_stats.allocate
+        def new(frame):
+            struct_frame, (values, template, fields) = get(frame)
+            struct_obj = allocate(Struct(values))
+            if fields:
+                # the other initializers run in a frame of their own,
+                # holding the values of the literal fields
+                frame = list(template)
+                frame[0] = struct_frame
+                for i, slot, expr in fields:
+                    frame[slot] = struct_obj[i] = expr(frame)
+            return struct_obj
+        return new
+
+    def __call(self, call_rvalue, tail=False):
+        """Returns the closure making the call, or if tail, the return
+        statement closure leaving it to the caller"""
+        args = tuple(self.__expr(x) for x in call_rvalue.args)
+        name = call_rvalue.fun.lexeme
+        built_in = builtins.BUILT_INS.get(name)
+        if built_in is not None:
+            return _built_in(built_in, args, call_rvalue)
+        get = self.__var(call_rvalue)
+        def call(frame):
+            fun_frame, (size, params, body) = get(frame)
+            # a new frame linked to the one the function was declared in
+            new_frame = [fun_frame] + [None] * (size - 1)
+            for slot, arg in zip(params, args):
+                new_frame[slot] = arg(frame)
+            if tail:
+                return body, new_frame
+            result = body(new_frame)
+            while result is not None:
+                if len(result) == 1:
+                    return result[0]
+                # the function returned a call: make it in its place
+                body, new_frame = result
+                result = body(new_frame)
+        return call
+
+    def __bool(self, bool_expr):
+        first = self.__expr(bool_expr.first_expr)
+        if bool_expr.bool_rel is not None:
+            second = self.__expr(bool_expr.second_expr)
+            op = operators.OPERATIONS[bool_expr.op]
+            literal = constant(bool_expr.second_expr, self.constants)
+            if literal is not None:
+                value = literal[0]
+                cond = lambda frame: op(first(frame), value)
+            else:
+                cond = lambda frame: op(first(frame), second(frame))
+        else:
+            cond = lambda frame: first(frame) == True
+        if bool_expr.negated:
+            test = cond
+            cond = lambda frame: not test(frame)
+        if bool_expr.bool_connector is None:
+            return cond
+        rest = self.__bool(bool_expr.rest)
+        if not self.eager:
+            if bool_expr.bool_connector.lexeme == 'and':
+                return lambda frame: cond(frame) and rest(frame)
+            return lambda frame: cond(frame) or rest(frame)
+        # both sides are always evaluated
+        if bool_expr.bool_connector.lexeme == 'and':
+            def and_cond(frame):
+                left = cond(frame)
+                right = rest(frame)
+                return left and right
+            return and_cond
+        def or_cond(frame):
+            left = cond(frame)
+            right = rest(frame)
+            return left or right
+        return or_cond
+
+
+def _frame(frame, depth):
+    while depth:
+        frame = frame[0]
+        depth -= 1
+    return frame
+
+def constant(expr, constants):
+    """Returns (value,) for a literal, its value taken from the program's
+    constant pool constants, or None"""
+    if isinstance(expr, ast.SimpleExpr):
+        expr = expr.term
+    if not isinstance(expr, ast.SimpleRValue) or expr.const is None:
+        return None
+    return (constants[expr.const],)
+
+def _built_in(built_in, args, call_rvalue):
+    """Returns the closure calling the BuiltIn built_in with the values of
+    the arg closures args, and if it is located, the position of
+    resolver.error_token for call_rvalue"""
+    function = built_in.function
+    extra = ()
+    if built_in.located:
+        the_token = resolver.error_token(call_rvalue)
+        extra = (the_token.line, the_token.column)
+    if len(args) == 1 and not extra:
+        arg = args[0]
+        return lambda frame: function(arg(frame))
+    if len(args) == 1:
+        arg = args[0]
+        line, column = extra
+        return lambda frame: function(arg(frame), line, column)
+    return lambda frame: function(*[arg(frame) for arg in args], *extra)
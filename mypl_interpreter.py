@@ -1,322 +1,278 @@
-import mypl_token as token 
-import mypl_ast as ast 
-import mypl_error as error 
-import mypl_symbol_table as sym_tbl
-
-class ReturnException(Exception): pass
-
-class Interpreter(ast.Visitor): 
-    """A MyPL interpret visitor implementation"""
-    
-    def __init__(self): 
-        # initialize the symbol table (for ids -> values) 
-        self.sym_table = sym_tbl.SymbolTable() 
-        # holds the type of last expression type 
-        self.current_value = None
-        self.current_token = None #keeps the curren token for error reporting
-        self.expressionIsTrue = True #checks for conditional statements and loopss
-        self.structDict = {} #holds values of varDecls of the struct
-        self.inStruct = False #checks to see if enviroment is inside of a struct
-        self.varId = "x" #holds the current var id
-        # the heap {oid:struct_obj} 
-        self.structId = 1
-        self.heap = {}
-
-    def __error(self, msg, the_token): 
-        raise error.MyPLError(msg, the_token.line, the_token.column)
-        
-    def run(self, stmt_list): 
-        try: 
-            stmt_list.accept(self) 
-        except ReturnException: 
-            pass
-        
-    def visit_stmt_list(self, stmt_list): 
-        #print("visit_stmt_list")
-        self.sym_table.push_environment() 
-        for stmt in stmt_list.stmts: 
-            stmt.accept(self) 
-        self.sym_table.pop_environment()
-
-    def visit_expr_stmt(self, expr_stmt):
-        #print("visit_expr_stmt")
-        expr_stmt.expr.accept(self) 
-    
-    def visit_simple_expr(self, exprStmt):
-        #print("visit_simple_expr")
-        exprStmt.term.accept(self)
-    
-    def visit_complex_expr(self, compExpr):
-        compExpr.first_operand.accept(self)
-        temp = self.current_value
-        compExpr.rest.accept(self)
-        temp2 = self.current_value
-        temp3 = compExpr.math_rel.lexeme
-        if temp3 == '+':
-            self.current_value = temp + temp2
-        elif temp3 == '-':
-            self.current_value = temp - temp2
-        elif temp3 == '*':
-            self.current_value = temp * temp2
-        elif temp3 == '/':
-            self.current_value = temp / temp2
-        elif temp3 == '%':
-            self.current_value = temp % temp2
-        
-    def visit_simple_rvalue(self, simple_rvalue): 
-        #print("visit_simple_rvalue")
-        if simple_rvalue.val.tokentype == token.INTVAL: 
-            self.current_value = int(simple_rvalue.val.lexeme) 
-        elif simple_rvalue.val.tokentype == token.FLOATVAL: 
-            self.current_value = float(simple_rvalue.val.lexeme) 
-        elif simple_rvalue.val.tokentype == token.BOOLVAL: 
-            self.current_value = True 
-            if simple_rvalue.val.lexeme == 'false': 
-                self.current_value = False 
-        elif simple_rvalue.val.tokentype == token.STRINGVAL: 
-            self.current_value = simple_rvalue.val.lexeme 
-        elif simple_rvalue.val.tokentype == token.NIL: 
-            self.current_value = None
-        elif simple_rvalue.val.tokentype == token.ID:
-            self.current_value = self.sym_table.get_info(simple_rvalue.val.lexeme)
-        self.current_token = simple_rvalue.val
-            
-    def visit_id_rvalue(self, id_rvalue): 
-        #print("visit_id_rvalue")
-        if len(id_rvalue.path) == 1:
-            var_name = id_rvalue.path[0].lexeme 
-            var_val = self.sym_table.get_info(var_name) 
-        else:
-            var_name = id_rvalue.path[0].lexeme
-            var_val = self.sym_table.get_info(var_name)
-            dict = 0
-            for i, path_id in enumerate(id_rvalue.path):
-                if i < len(id_rvalue.path) - 1:
-                    dict = self.heap[var_val]
-                    nextName = id_rvalue.path[i+1].lexeme
-                    var_val = dict[nextName]
-        self.current_value = var_val
-
-    def visit_lvalue(self, lval):
-        #print("visit_lvalue") 
-        identifier = lval.path[0].lexeme 
-        if len(lval.path) == 1: 
-            self.sym_table.set_info(identifier, self.current_value) 
-        else: 
-            var_val = self.sym_table.get_info(identifier)
-            dict = 0
-            for i, x in enumerate(lval.path):
-                if i < len(lval.path) - 1:
-                    dict = self.heap[var_val]
-                    identifier = lval.path[i + 1].lexeme
-                    var_val = dict[identifier]
-                else:
-                    dict[x.lexeme] = self.current_value
-
-    def visit_var_decl_stmt(self, var_decl): 
-        var_decl.var_expr.accept(self) 
-        exp_value = self.current_value 
-        var_name = var_decl.var_id.lexeme 
-        self.varId = var_name
-        self.sym_table.add_id(var_decl.var_id.lexeme) 
-        self.sym_table.set_info(var_decl.var_id.lexeme, exp_value)
-        if self.inStruct:
-            self.structDict[var_decl.var_id.lexeme] =  exp_value
-
-
-    def visit_call_rvalue(self, call_rvalue): 
-        #print("visit_call_rvalue")
-        # handle built in functions first 
-        built_ins = ['print', 'length', 'get', 'readi', 'reads', 'readf', 'itof', 'itos', 'ftos', 'stoi', 'stof'] 
-        if call_rvalue.fun.lexeme in built_ins: 
-            self.__built_in_fun_helper(call_rvalue) 
-        else: 
-            fun_info = self.sym_table.get_info(call_rvalue.fun.lexeme)
-            curr_env = self.sym_table.get_env_id()
-            fun_stmt = fun_info[1]
-            #gets the value of the parameters
-            params = []
-            for x in call_rvalue.args:     
-                x.accept(self)
-                params.append(self.current_value)
-            self.sym_table.set_env_id(fun_info[0])
-            self.sym_table.push_environment()
-            for i, x in enumerate(fun_stmt.params):
-                self.sym_table.add_id(x.param_name.lexeme)
-                self.sym_table.set_info(x.param_name.lexeme, params[i])
-            #goes into the body of the function
-            self.run(fun_stmt.stmt_list)        
-            self.sym_table.pop_environment()
-            self.sym_table.set_env_id(curr_env)
-            
-                
-    def __built_in_fun_helper(self, call_rvalue): 
-        #print("test 1.0")
-        fun_name = call_rvalue.fun.lexeme 
-        arg_vals = [] 
-        for x in call_rvalue.args:
-            x.accept(self)
-            arg_vals.append(self.current_value)
-        # check for nil values 
-        for i, arg in enumerate(arg_vals): 
-            if arg is None: 
-                i = 0#... report a nil value error ...
-        # perform each function 
-        if fun_name == 'print': 
-            arg_vals[0] = arg_vals[0].replace(r'\n','\n') 
-            print(arg_vals[0], end='') 
-        elif fun_name == 'length': 
-            self.current_value = len(arg_vals[0]) 
-        elif fun_name == 'get': 
-            if 0 <= arg_vals[0] < len(arg_vals[1]): 
-                self.current_value = arg_vals[1][arg_vals[0]] 
-            else: 
-                self.__error("get out of bounds", self.current_token) 
-        elif fun_name == 'reads': 
-            self.current_value = input() 
-        elif fun_name == 'readi': 
-            try: 
-                self.current_value = int(input()) 
-            except ValueError: 
-                self.__error('bad int value', call_rvalue.fun) 
-        elif fun_name == 'ftos':
-            self.current_value = str(arg_vals[0])
-        elif fun_name == 'stof':
-            self.current_value = float(arg_vals[0])
-        elif fun_name == 'itof':
-            temp = arg_vals[0]
-            self.check_for_nil(temp)
-            self.current_value = float(arg_vals[0])
-        elif fun_name == 'itos':
-            temp = arg_vals[0]
-            self.check_for_nil(temp)
-            self.current_value = str(arg_vals[0])
-        elif fun_name == 'stoi':
-            self.current_value = int(arg_vals[0])
-        elif fun_name == 'reads':
-            self.current_value = input()
-        elif fun_name == 'readf':
-            temp = input()
-            self.current_value = float(temp)
-        #... etc ...
-
-    def check_for_nil(self, val):
-        if val == 'nil' or val == None:
-            self.__error("can't do that with a nil", self.current_token)
-            
-    def visit_while_stmt(self, whileStmt):
-        self.expressionIsTrue = True
-        whileStmt.bool_expr.accept(self)
-        while self.expressionIsTrue:
-            self.sym_table.push_environment()
-            for x in whileStmt.stmt_list.stmts:
-                x.accept(self)
-            self.sym_table.pop_environment()
-            whileStmt.bool_expr.accept(self)
-            
-    def visit_bool_expr(self, boolStmt):
-        self.expressionIsTrue = False
-        boolStmt.first_expr.accept(self)
-        lhs = self.current_value
-        if boolStmt.bool_rel != None:
-            cond = boolStmt.bool_rel.lexeme
-            boolStmt.second_expr.accept(self)
-            rhs = self.current_value
-            #if rhs == None or lhs == None:
-            #    print(rhs, " + ", lhs, " ", cond)
-            #    self.__error("can't do comparisons with nil values", self.current_token)
-            if cond == '<' and lhs < rhs:
-                self.expressionIsTrue = True
-            elif cond == '<=' and lhs <= rhs:
-                self.expressionIsTrue = True
-            elif cond == '>' and lhs > rhs:
-                self.expressionIsTrue = True
-            elif cond == '>=' and lhs >= rhs:
-                self.expressionIsTrue = True
-            elif cond == '==' and lhs == rhs:
-                self.expressionIsTrue = True
-            elif cond == '!=' and lhs != rhs:
-                self.expressionIsTrue = True
-        elif lhs == True:
-            self.expressionIsTrue = True
-        if boolStmt.negated == True:
-            self.expressionIsTrue = not self.expressionIsTrue
-        if boolStmt.bool_connector != None:
-            temp = self.expressionIsTrue
-            boolStmt.rest.accept(self)
-            if boolStmt.bool_connector.lexeme == 'and':
-                self.expressionIsTrue = temp and self.expressionIsTrue
-            elif boolStmt.bool_connector.lexeme == 'or':
-                self.expressionIsTrue = temp or self.expressionIsTrue
-    
-    def visit_assign_stmt(self, assignStmt):
-        assignStmt.rhs.accept(self)
-        assignStmt.lhs.accept(self)
-    
-    def visit_if_stmt(self, ifStmt):
-        ifStmt.if_part.bool_expr.accept(self)
-        if self.expressionIsTrue:
-            self.sym_table.push_environment()
-            for x in ifStmt.if_part.stmt_list.stmts:
-                x.accept(self)
-            self.sym_table.pop_environment()
-        else:
-            stillFalse = True
-            for x in ifStmt.elseifs:
-                if stillFalse:
-                    x.bool_expr.accept(self)
-                    if self.expressionIsTrue:
-                        stillFalse = False
-                        self.sym_table.push_environment()
-                        for y in x.stmt_list.stmts:
-                            y.accept(self)
-                        self.sym_table.pop_environment()
-            if stillFalse and ifStmt.has_else:
-                self.sym_table.push_environment()
-                for x in ifStmt.else_stmts.stmts:
-                    x.accept(self)
-                self.sym_table.pop_environment()
-    
-    def visit_struct_decl_stmt(self, structStmt):
-        curr_env = self.sym_table.get_env_id()
-        self.sym_table.add_id(structStmt.struct_id.lexeme)
-        structValue = [curr_env, structStmt.var_decls]
-        self.sym_table.set_info(structStmt.struct_id.lexeme, structValue)
-        
-    def visit_new_rvalue(self, newStmt):
-        struct_info = self.sym_table.get_info(newStmt.struct_type.lexeme)
-        curr_env = self.sym_table.get_env_id() 
-        self.sym_table.set_env_id(struct_info[0])
-        struct_obj = {}
-        
-        self.structDict = {}
-        self.inStruct = True
-    
-        self.sym_table.push_environment()
-        for x in struct_info[1]:
-            temp = x.var_id.lexeme
-            x.var_expr.accept(self)
-            struct_obj[temp] = self.current_value
-        self.sym_table.pop_environment()
-    
-        self.inStruct = False
-        #struct_obj = dict(self.structDict)
-        self.structDict = {}
-        
-        self.sym_table.set_env_id(curr_env)
-        oid = id(struct_obj)
-        self.heap[oid] = struct_obj
-        self.current_value = oid 
-        self.structId += 1
-
-    def visit_fun_decl_stmt(self, funStmt):
-        curr_env = self.sym_table.get_env_id()
-        self.sym_table.add_id(funStmt.fun_name.lexeme)
-        fun_val = [curr_env, funStmt]
-        self.sym_table.set_info(funStmt.fun_name.lexeme, fun_val)
-      
-        
-    def visit_return_stmt(self, returnStmt):
-        if returnStmt.return_expr != None:
-            returnStmt.return_expr.accept(self)
-        raise ReturnException()
+import mypl_ast as ast 
+import mypl_error as error 
+import mypl_resolver as resolver
+import mypl_operators as operators
+import mypl_builtins as builtins
+import mypl_runtime as runtime
+
+class Interpreter(ast.Visitor): 
+    """A MyPL interpret visitor implementation. and/or only evaluate their
+    right side when the left side does not decide the result, unless eager
+    is set, when both sides are always evaluated as in older versions.
+
+    A tail call (see mypl_resolver) evaluates its arguments into the
+    callee's frame and leaves the call to the function being returned
+    from, which runs it in a loop, so tail recursion takes no Python stack."""
+    
+    def __init__(self, eager=False): 
+        self.eager = eager
+        # the frame of the running function (or of the program), a list
+        # holding the enclosing frame followed by the values of its slots
+        self.frame = None
+        # holds the type of last expression type 
+        self.current_value = None
+        # the token each located built-in call reports errors at (see
+        # resolver.error_token), by call
+        self.error_tokens = {}
+        self.expressionIsTrue = True #checks for conditional statements and loopss
+        # set by a return statement, so the statement lists running stop
+        # until the call (or the program) it returns from is left
+        self.returning = False
+        # (FunDeclStmt, frame) of the call a tail call return left to make
+        self.tail_call = None
+        # the program's constant pool, indexed by literals' const
+        self.constants = None
+        # struct allocation and garbage collection counters
+        self.heap_stats = runtime.HeapStats()
+
+    def __error(self, msg, the_token): 
+        raise error.MyPLError(msg, the_token.line, the_token.column)
+        
+    def run(self, stmt_list): 
+        resolver.resolve(stmt_list)
+        self.constants = stmt_list.constants
+        self.frame = [None] * stmt_list.frame_size
+        self.heap_stats.scalar_replaced_sites = stmt_list.scalar_replaced_sites
+        with self.heap_stats:
+            stmt_list.accept(self) 
+
+    def __frame(self, depth):
+        # functions are only declared at the top level, so depth is 0 or 1
+        frame = self.frame
+        while depth:
+            frame = frame[0]
+            depth -= 1
+        return frame
+
+    def __leave(self, stmt_list):
+        # drop the values of the variables a block declared (the resolver
+        # leaves scope_start as None for blocks declaring nothing)
+        if stmt_list.scope_start is not None:
+            start, end = stmt_list.scope_start, stmt_list.scope_end
+            self.frame[start:end] = [None] * (end - start)
+
+    def __get(self, node):
+        if node.slot is None:
+            return None
+        if node.depth == 0:
+            return self.frame[node.slot]
+        return self.__frame(node.depth)[node.slot]
+        
+    def visit_stmt_list(self, stmt_list): 
+        #print("visit_stmt_list")
+        for stmt in stmt_list.stmts: 
+            stmt.accept(self) 
+            if self.returning: 
+                return
+
+    def visit_expr_stmt(self, expr_stmt):
+        #print("visit_expr_stmt")
+        expr_stmt.expr.accept(self) 
+    
+    def visit_simple_expr(self, exprStmt):
+        #print("visit_simple_expr")
+        exprStmt.term.accept(self)
+    
+    def visit_complex_expr(self, compExpr):
+        compExpr.first_operand.accept(self)
+        temp = self.current_value
+        compExpr.rest.accept(self)
+        temp2 = self.current_value
+        # the operation was picked from the operand types by the type checker
+        self.current_value = operators.OPERATIONS[compExpr.op](temp, temp2)
+        
+    def visit_simple_rvalue(self, simple_rvalue): 
+        #print("visit_simple_rvalue")
+        if simple_rvalue.const is not None: 
+            self.current_value = self.constants[simple_rvalue.const] 
+        else: 
+            self.current_value = self.__get(simple_rvalue)
+            
+    def visit_id_rvalue(self, id_rvalue): 
+        #print("visit_id_rvalue")
+        var_val = self.__get(id_rvalue)
+        if len(id_rvalue.path) > 1:
+            # structs are runtime.Structs, indexed by field
+            for i in id_rvalue.fields:
+                var_val = var_val[i]
+        self.current_value = var_val
+
+    def visit_lvalue(self, lval):
+        #print("visit_lvalue") 
+        if len(lval.path) == 1: 
+            if lval.slot is not None:
+                self.__frame(lval.depth)[lval.slot] = self.current_value
+        else: 
+            var_val = self.__get(lval)
+            fields = lval.fields
+            for i in range(len(fields) - 1):
+                var_val = var_val[fields[i]]
+            var_val[fields[-1]] = self.current_value
+
+    def visit_var_decl_stmt(self, var_decl): 
+        var_decl.var_expr.accept(self) 
+        self.frame[var_decl.slot] = self.current_value
+
+
+    def visit_call_rvalue(self, call_rvalue): 
+        #print("visit_call_rvalue")
+        # handle built in functions first 
+        built_in = builtins.BUILT_INS.get(call_rvalue.fun.lexeme) 
+        if built_in is not None: 
+            self.__built_in_fun_helper(built_in, call_rvalue) 
+        else: 
+            fun_stmt, frame = self.__call_frame(call_rvalue)
+            curr_frame = self.frame
+            while True:
+                self.frame = frame
+                #goes into the body of the function
+                fun_stmt.stmt_list.accept(self)
+                if not self.returning:
+                    # the function ran off its end, returning nil
+                    self.current_value = None
+                self.returning = False
+                if self.tail_call is None:
+                    break
+                # the function returned a call: make it in its place
+                fun_stmt, frame = self.tail_call
+                self.tail_call = None
+            self.frame = curr_frame
+
+    def __call_frame(self, call_rvalue):
+        # the function called and its new frame, holding the arguments
+        fun_info = self.__get(call_rvalue)
+        fun_stmt = fun_info[1]
+        # a new frame linked to the one the function was declared in
+        frame = [fun_info[0]] + [None] * (fun_stmt.frame_size - 1)
+        #gets the value of the parameters
+        for i, x in enumerate(call_rvalue.args):     
+            x.accept(self)
+            frame[fun_stmt.params[i].slot] = self.current_value
+        return fun_stmt, frame
+            
+                
+    def __built_in_fun_helper(self, built_in, call_rvalue): 
+        arg_vals = [] 
+        for x in call_rvalue.args:
+            x.accept(self)
+            arg_vals.append(self.current_value)
+        if built_in.located: 
+            the_token = self.error_tokens.get(call_rvalue)
+            if the_token is None:
+                the_token = self.error_tokens[call_rvalue] = resolver.error_token(call_rvalue)
+            arg_vals.append(the_token.line) 
+            arg_vals.append(the_token.column) 
+        self.current_value = built_in.function(*arg_vals) 
+            
+    def visit_while_stmt(self, whileStmt):
+        self.expressionIsTrue = True
+        whileStmt.bool_expr.accept(self)
+        while self.expressionIsTrue:
+            for x in whileStmt.stmt_list.stmts:
+                x.accept(self)
+                if self.returning:
+                    return
+            whileStmt.bool_expr.accept(self)
+        self.__leave(whileStmt.stmt_list)
+            
+    def visit_bool_expr(self, boolStmt):
+        boolStmt.first_expr.accept(self)
+        lhs = self.current_value
+        # kept in a local, since the operands may call functions that
+        # evaluate conditions of their own
+        isTrue = False
+        if boolStmt.bool_rel != None:
+            boolStmt.second_expr.accept(self)
+            isTrue = operators.OPERATIONS[boolStmt.op](lhs, self.current_value)
+        elif lhs == True:
+            isTrue = True
+        if boolStmt.negated == True:
+            isTrue = not isTrue
+        self.expressionIsTrue = isTrue
+        if boolStmt.bool_connector != None:
+            isAnd = boolStmt.bool_connector.lexeme == 'and'
+            if not self.eager and isTrue != isAnd:
+                # false and ..., true or ...: the rest is not evaluated
+                return
+            boolStmt.rest.accept(self)
+            if isAnd:
+                self.expressionIsTrue = isTrue and self.expressionIsTrue
+            else:
+                self.expressionIsTrue = isTrue or self.expressionIsTrue
+    
+    def visit_assign_stmt(self, assignStmt):
+        assignStmt.rhs.accept(self)
+        assignStmt.lhs.accept(self)
+    
+    def visit_if_stmt(self, ifStmt):
+        ifStmt.if_part.bool_expr.accept(self)
+        if self.expressionIsTrue:
+            for x in ifStmt.if_part.stmt_list.stmts:
+                x.accept(self)
+                if self.returning:
+                    return
+            self.__leave(ifStmt.if_part.stmt_list)
+        else:
+            stillFalse = True
+            for x in ifStmt.elseifs:
+                if stillFalse:
+                    x.bool_expr.accept(self)
+                    if self.expressionIsTrue:
+                        stillFalse = False
+                        for y in x.stmt_list.stmts:
+                            y.accept(self)
+                            if self.returning:
+                                return
+                        self.__leave(x.stmt_list)
+            if stillFalse and ifStmt.has_else:
+                for x in ifStmt.else_stmts.stmts:
+                    x.accept(self)
+                    if self.returning:
+                        return
+                self.__leave(ifStmt.else_stmts)
+    
+    def visit_struct_decl_stmt(self, structStmt):
+        # the fields literals give, copied by new, and the other initializers
+        values, frame, initializers = resolver.struct_template(structStmt, self.constants)
+        structValue = [self.frame, structStmt, values, frame, initializers]
+        self.frame[structStmt.slot] = structValue
+        
+    def visit_new_rvalue(self, newStmt):
+        struct_frame, struct_stmt, values, frame, initializers = self.__get(newStmt)
+        struct_obj = self.heap_stats.allocate(runtime.Struct(values))
+        if initializers:
+            curr_frame = self.frame
+            # the other initializers run in a frame of their own, holding
+            # the values of the literal fields
+            self.frame = list(frame)
+            self.frame[0] = struct_frame
+            for i, x in initializers:
+                x.accept(self)
+                struct_obj[i] = self.current_value
+            self.frame = curr_frame
+        self.current_value = struct_obj
+
+    def visit_fun_decl_stmt(self, funStmt):
+        # a closure over the frame the function is declared in
+        fun_val = [self.frame, funStmt]
+        self.frame[funStmt.slot] = fun_val
+      
+        
+    def visit_return_stmt(self, returnStmt):
+        if returnStmt.tail_call:
+            self.tail_call = self.__call_frame(returnStmt.return_expr.term)
+        elif returnStmt.return_expr != None:
+            returnStmt.return_expr.accept(self)
+        else:
+            self.current_value = None
+        self.returning = True
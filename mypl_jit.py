@@ -0,0 +1,654 @@
+import mypl_token as token
+import mypl_ast as ast
+import mypl_interpreter as interpreter
+import mypl_resolver as resolver
+import mypl_operators as operators
+import mypl_transpiler as transpiler
+import mypl_builtins as builtins
+import mypl_runtime as runtime
+import os
+import sys
+
+# back-edges a while loop, and calls a function, takes before it is compiled
+LOOP_THRESHOLD = 50
+CALL_THRESHOLD = 20
+# most type signatures compiled for one loop or function
+MAX_VERSIONS = 4
+
+
+class JitInterpreter(interpreter.Interpreter):
+    """A tiered Interpreter. It walks the tree as Interpreter does, counting
+    the back-edges of each while loop and the calls of each function. Once
+    one gets hot it is compiled to Python for the types of the values it
+    was entered with (its loop variables or its arguments), and that code
+    is used whenever it is entered with those types again.
+
+    The types a version was compiled for are its guard: entering a loop or
+    function with other types is a guard failure, which compiles another
+    version (up to MAX_VERSIONS) or falls back to walking the tree.
+
+    A tail call (see mypl_resolver), walked or compiled, leaves the
+    function and its arguments in tail_call for call() to make in a loop,
+    except that compiled functions loop on tail calls to themselves. The
+    counters are kept per loop and function; see report(), which is
+    printed to stderr after the run when MYPL_JIT_STATS is set. The
+    thresholds default to LOOP_THRESHOLD and CALL_THRESHOLD."""
+
+    def __init__(self, eager=False, loop_threshold=LOOP_THRESHOLD, call_threshold=CALL_THRESHOLD):
+        interpreter.Interpreter.__init__(self, eager)
+        self.loop_threshold = loop_threshold
+        self.call_threshold = call_threshold
+        # loop or function node -> back-edges or calls walked
+        self.counts = {}
+        # (node, type signature) -> compiled Python function, None if it
+        # could not be had
+        self.versions = {}
+        # node -> type signatures compiled
+        self.signatures = {}
+        # node -> runs of compiled code
+        self.runs = {}
+        # node -> entries with types no version was compiled for
+        self.guard_failures = {}
+        # slots of the program frame read or written by functions or structs
+        self.shared = set()
+        # while node -> (loop variables kept in Python locals, Region)
+        self.loops = {}
+        # (function value, arguments) of the call a tail call return left
+        # to make
+        self.tail_call = None
+
+    def run(self, stmt_list):
+        resolver.resolve(stmt_list)
+        for stmt in stmt_list.stmts:
+            if isinstance(stmt, (ast.FunDeclStmt, ast.StructDeclStmt)):
+                region = Region()
+                stmt.accept(region)
+                self.shared.update(slot for depth, slot in region.refs if depth > 0)
+        interpreter.Interpreter.run(self, stmt_list)
+        if os.environ.get('MYPL_JIT_STATS'):
+            print(self.report(), file=sys.stderr)
+
+    def report(self):
+        """Returns the JIT counters, a line per loop or function that was
+        compiled"""
+        lines = ['%-24s %8s %8s %6s  %s' % ('loop/function', 'walked', 'compiled', 'guard', 'signatures')]
+        for node, signatures in self.signatures.items():
+            if isinstance(node, ast.FunDeclStmt):
+                name = 'fun %s (line %i)' % (node.fun_name.lexeme, node.fun_name.line)
+            else:
+                name = 'while (line %i)' % _line(node.bool_expr)
+            lines.append('%-24s %8i %8i %6i  %s' % (name, self.counts.get(node, 0), self.runs.get(node, 0),
+                                                     self.guard_failures.get(node, 0),
+                                                     ' '.join('(%s)' % ', '.join(t.__name__ for t in s) for s in signatures)))
+        return '\n'.join(lines)
+
+    def __read(self, node):
+        if node.slot is None:
+            return None
+        frame = self.frame
+        for i in range(node.depth):
+            frame = frame[0]
+        return frame[node.slot]
+
+    def __specialized(self, node, signature, compile_version):
+        compiled = self.versions.get((node, signature))
+        if compiled is not None:
+            self.runs[node] = self.runs.get(node, 0) + 1
+            return compiled
+        signatures = self.signatures.setdefault(node, [])
+        if signatures:
+            self.guard_failures[node] = self.guard_failures.get(node, 0) + 1
+        if (node, signature) in self.versions or len(signatures) >= MAX_VERSIONS:
+            return None
+        compiled = compile_version(signature)
+        signatures.append(signature)
+        self.versions[(node, signature)] = compiled
+        self.runs[node] = self.runs.get(node, 0) + 1
+        return compiled
+
+    # functions
+
+    def visit_call_rvalue(self, call_rvalue):
+        if call_rvalue.fun.lexeme in builtins.BUILT_INS:
+            interpreter.Interpreter.visit_call_rvalue(self, call_rvalue)
+            return
+        fun_info = self.__read(call_rvalue)
+        args = []
+        for x in call_rvalue.args:
+            x.accept(self)
+            args.append(self.current_value)
+        self.current_value = self.call(fun_info, args)
+
+    def call(self, fun_info, args):
+        """Calls the function value fun_info, returning its result"""
+        while True:
+            fun_stmt = fun_info[1]
+            signature = tuple(map(type, args))
+            compiled = self.versions.get((fun_stmt, signature))
+            if compiled is not None:
+                self.runs[fun_stmt] += 1
+            else:
+                count = self.counts.get(fun_stmt, 0) + 1
+                self.counts[fun_stmt] = count
+                if count >= self.call_threshold:
+                    compiled = self.__specialized(fun_stmt, signature,
+                                                  lambda signature: compile_function(fun_stmt, signature,
+                                                                                     self.constants, self.eager))
+            if compiled is not None:
+                result = compiled(self, fun_info[0], *args)
+            else:
+                # a new frame linked to the one the function was declared in
+                frame = [fun_info[0]] + [None] * (fun_stmt.frame_size - 1)
+                for param, value in zip(fun_stmt.params, args):
+                    frame[param.slot] = value
+                curr_frame = self.frame
+                self.frame = frame
+                fun_stmt.stmt_list.accept(self)
+                if not self.returning:
+                    # the function ran off its end, returning nil as
+                    # compiled functions do
+                    self.current_value = None
+                self.returning = False
+                self.frame = curr_frame
+                result = self.current_value
+            if self.tail_call is None:
+                return result
+            # the function returned a call: make it in its place
+            fun_info, args = self.tail_call
+            self.tail_call = None
+
+    def visit_return_stmt(self, return_stmt):
+        if not return_stmt.tail_call:
+            interpreter.Interpreter.visit_return_stmt(self, return_stmt)
+            return
+        call_rvalue = return_stmt.return_expr.term
+        fun_info = self.__read(call_rvalue)
+        args = []
+        for x in call_rvalue.args:
+            x.accept(self)
+            args.append(self.current_value)
+        self.tail_call = (fun_info, args)
+        self.returning = True
+
+    def new_struct(self, struct_info):
+        """Returns a new struct of the struct value struct_info"""
+        struct_frame, struct_stmt, values, frame, initializers = struct_info
+        struct_obj = self.heap_stats.allocate(runtime.Struct(values))
+        if initializers:
+            curr_frame = self.frame
+            self.frame = list(frame)
+            self.frame[0] = struct_frame
+            for i, x in initializers:
+                x.accept(self)
+                struct_obj[i] = self.current_value
+            self.frame = curr_frame
+        return struct_obj
+
+    def visit_new_rvalue(self, new_rvalue):
+        self.current_value = self.new_struct(self.__read(new_rvalue))
+
+    # loops
+
+    def visit_while_stmt(self, while_stmt):
+        count = self.counts.get(while_stmt, 0)
+        if count >= self.loop_threshold and self.__run_loop(while_stmt):
+            return
+        while_stmt.bool_expr.accept(self)
+        while self.expressionIsTrue:
+            for x in while_stmt.stmt_list.stmts:
+                x.accept(self)
+                if self.returning:
+                    self.counts[while_stmt] = count
+                    return
+            count += 1
+            if count == self.loop_threshold:
+                # carry on in compiled code from the next test
+                self.counts[while_stmt] = count
+                if self.__run_loop(while_stmt):
+                    return
+            while_stmt.bool_expr.accept(self)
+        self.counts[while_stmt] = count
+        body = while_stmt.stmt_list
+        if body.scope_start is not None:
+            self.frame[body.scope_start:body.scope_end] = [None] * (body.scope_end - body.scope_start)
+
+    def __run_loop(self, while_stmt):
+        """Runs the rest of the loop as compiled code, returning False if
+        there is none for the types of its variables"""
+        if while_stmt not in self.loops:
+            region = Region()
+            while_stmt.accept(region)
+            # in the program frame, variables functions use stay in the frame
+            shared = self.shared if self.frame[0] is None else set()
+            cached = set(slot for depth, slot in region.refs if depth == 0 and slot not in shared)
+            live = tuple(sorted(cached - region.decls))
+            self.loops[while_stmt] = (live, cached, region)
+        live, cached, region = self.loops[while_stmt]
+        frame = self.frame
+        signature = tuple(type(frame[slot]) for slot in live)
+        compiled = self.__specialized(while_stmt, signature,
+                                      lambda signature: compile_loop(while_stmt, region, live, cached,
+                                                                     signature, self.constants, self.eager))
+        if compiled is None:
+            return False
+        result = compiled(self, frame)
+        if result is not None:
+            # the loop returned from the function (or program)
+            self.current_value = result[0]
+            self.returning = True
+        return True
+
+
+class Region(ast.Visitor):
+    """Collects the variables a loop or function body uses: refs, the
+    (depth, slot) of every variable read or written, decls, the slots
+    declared, stores, (slot, expr) for every value stored in a slot of
+    the region's own frame, and tail_calls, (CallRValue, whether it is in
+    a while loop) for every tail call returned."""
+
+    def __init__(self):
+        self.refs = set()
+        self.decls = set()
+        self.stores = []
+        self.tail_calls = []
+        self.loops = 0
+
+    def visit_stmt_list(self, stmt_list):
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+
+    def visit_expr_stmt(self, expr_stmt):
+        expr_stmt.expr.accept(self)
+
+    def visit_var_decl_stmt(self, var_decl):
+        var_decl.var_expr.accept(self)
+        self.refs.add((0, var_decl.slot))
+        self.decls.add(var_decl.slot)
+        self.stores.append((var_decl.slot, var_decl.var_expr))
+
+    def visit_assign_stmt(self, assign_stmt):
+        assign_stmt.rhs.accept(self)
+        lval = assign_stmt.lhs
+        if lval.slot is not None:
+            self.refs.add((lval.depth, lval.slot))
+            if len(lval.path) == 1 and lval.depth == 0:
+                self.stores.append((lval.slot, assign_stmt.rhs))
+
+    def visit_struct_decl_stmt(self, struct_decl):
+        for var_decl in struct_decl.var_decls:
+            var_decl.accept(self)
+
+    def visit_fun_decl_stmt(self, fun_decl):
+        fun_decl.stmt_list.accept(self)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.return_expr != None:
+            return_stmt.return_expr.accept(self)
+        if return_stmt.tail_call:
+            self.tail_calls.append((return_stmt.return_expr.term, self.loops > 0))
+
+    def visit_while_stmt(self, while_stmt):
+        while_stmt.bool_expr.accept(self)
+        self.loops += 1
+        while_stmt.stmt_list.accept(self)
+        self.loops -= 1
+
+    def visit_if_stmt(self, if_stmt):
+        for basic_if in [if_stmt.if_part] + if_stmt.elseifs:
+            basic_if.bool_expr.accept(self)
+            basic_if.stmt_list.accept(self)
+        if if_stmt.has_else:
+            if_stmt.else_stmts.accept(self)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        while isinstance(complex_expr, ast.ComplexExpr):
+            complex_expr.first_operand.accept(self)
+            complex_expr = complex_expr.rest
+        complex_expr.accept(self)
+
+    def visit_bool_expr(self, bool_expr):
+        while bool_expr is not None:
+            bool_expr.first_expr.accept(self)
+            if bool_expr.bool_rel != None:
+                bool_expr.second_expr.accept(self)
+            bool_expr = bool_expr.rest
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.val.tokentype == token.ID and simple_rvalue.slot is not None:
+            self.refs.add((simple_rvalue.depth, simple_rvalue.slot))
+
+    def visit_new_rvalue(self, new_rvalue):
+        if new_rvalue.slot is not None:
+            self.refs.add((new_rvalue.depth, new_rvalue.slot))
+
+    def visit_call_rvalue(self, call_rvalue):
+        if call_rvalue.slot is not None:
+            self.refs.add((call_rvalue.depth, call_rvalue.slot))
+        for arg in call_rvalue.args:
+            arg.accept(self)
+
+    def visit_id_rvalue(self, id_rvalue):
+        if id_rvalue.slot is not None:
+            self.refs.add((id_rvalue.depth, id_rvalue.slot))
+
+
+NUMBERS = (int, float)
+MATH_TYPES = {(int, int): int, (int, float): float, (float, int): float, (float, float): float}
+# the Python types of values of the types built-in functions declare
+VALUE_TYPES = {token.INTVAL: int, token.FLOATVAL: float, token.BOOLVAL: bool, token.STRINGVAL: str}
+# built-in functions checking for a nil argument -> the conversion they make
+NIL_CHECKED = {runtime.itos: 'str', runtime.itof: 'float'}
+
+class Specializer(ast.Visitor):
+    """Generates the Python source of a loop or function body, given the
+    types of some of the variables of its frame (types, slot -> type).
+    Values of frame slots in cached are kept in Python locals, the rest
+    are read from the frame lists, and struct fields are indexed as the
+    type checker numbered them. Knowing a type lets the code skip itof
+    and itos's nil checks and the == True of a bool condition, and
+    evaluate and/or lazily even if eager when the right side can neither
+    raise nor have effects. Only cached slots are taken to have their
+    types: a function called from the code can store any value in the
+    others.
+
+    A tail call to the function being compiled with the types it is
+    compiled for, outside while loops, rebinds the parameters and runs the
+    body (in a while True loop) again. Other tail calls are left to
+    JitInterpreter.call in jit.tail_call."""
+
+    def __init__(self, literals, types, cached, returns_tuple, recursion=None, eager=False):
+        self.eager = eager
+        # the program's constant pool
+        self.literals = literals
+        self.types = types
+        self.cached = cached
+        self.returns_tuple = returns_tuple
+        # (FunDeclStmt, signature, Python name) of a function being
+        # compiled, whose calls to itself with the same types can skip
+        # JitInterpreter.call if direct (if none of its tail calls are left
+        # to JitInterpreter.call, as a direct call would not make them)
+        self.recursion = recursion
+        self.direct = True
+        self.loops = 0
+        self.lines = []
+        self.indent = 1
+        self.source = None
+
+    def emit(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def block(self, stmt_list):
+        self.indent += 1
+        if not stmt_list.stmts:
+            self.emit('pass')
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+        self.indent -= 1
+
+    def expr(self, node):
+        node.accept(self)
+        return self.source
+
+    def var(self, depth, slot):
+        if slot is None:
+            return 'None'
+        if depth == 0:
+            return 'v%i' % slot if slot in self.cached else 'frame[%i]' % slot
+        return 'g' + '[0]' * (depth - 1) + '[%i]' % slot
+
+    def type_of(self, expr):
+        """The type of the value of expr if it is known, else None"""
+        if isinstance(expr, ast.SimpleExpr):
+            expr = expr.term
+        if isinstance(expr, ast.ComplexExpr):
+            lhs, rhs = self.type_of(expr.first_operand), self.type_of(expr.rest)
+            if lhs is str and rhs is str and expr.math_rel.lexeme == '+':
+                return str
+            return MATH_TYPES.get((lhs, rhs))
+        if isinstance(expr, ast.SimpleRValue):
+            if expr.const is not None:
+                return type(self.literals[expr.const])
+            if expr.depth == 0 and expr.slot in self.cached:
+                return self.types.get(expr.slot)
+            return None
+        if isinstance(expr, ast.CallRValue):
+            built_in = builtins.BUILT_INS.get(expr.fun.lexeme)
+            return VALUE_TYPES.get(built_in.result) if built_in is not None else None
+        return None
+
+    def recursive(self, call_rvalue):
+        """True if call_rvalue calls the function being compiled with the
+        types it is compiled for"""
+        return (self.recursion is not None and call_rvalue.depth == 1 and
+                call_rvalue.slot == self.recursion[0].slot and
+                tuple(self.type_of(x) for x in call_rvalue.args) == self.recursion[1])
+
+    def safe(self, expr):
+        """True if evaluating expr can neither raise nor have effects"""
+        if isinstance(expr, ast.SimpleExpr):
+            expr = expr.term
+        if isinstance(expr, ast.ComplexExpr):
+            lhs, rhs = self.type_of(expr.first_operand), self.type_of(expr.rest)
+            if not self.safe(expr.first_operand) or not self.safe(expr.rest):
+                return False
+            if expr.math_rel.lexeme in ('+', '-', '*'):
+                return lhs in NUMBERS and rhs in NUMBERS or (lhs is str and rhs is str and expr.math_rel.lexeme == '+')
+            return False
+        return isinstance(expr, ast.SimpleRValue)
+
+    def visit_expr_stmt(self, expr_stmt):
+        self.emit(self.expr(expr_stmt.expr))
+
+    def visit_var_decl_stmt(self, var_decl):
+        self.emit('%s = %s' % (self.var(0, var_decl.slot), self.expr(var_decl.var_expr)))
+
+    def visit_assign_stmt(self, assign_stmt):
+        value = self.expr(assign_stmt.rhs)
+        lval = assign_stmt.lhs
+        if lval.slot is None:
+            self.emit(value)
+            return
+        target = self.var(lval.depth, lval.slot)
+        for i in lval.fields or ():
+            target = '%s[%i]' % (target, i)
+        self.emit('%s = %s' % (target, value))
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.tail_call:
+            call_rvalue = return_stmt.return_expr.term
+            args = [self.expr(x) for x in call_rvalue.args]
+            if self.loops == 0 and self.recursive(call_rvalue):
+                params = ['v%i' % x.slot for x in self.recursion[0].params]
+                if params:
+                    self.emit('%s = %s' % (', '.join(params), ', '.join(args)))
+                self.emit('continue')
+            else:
+                self.emit('jit.tail_call = (%s, [%s])' % (self.var(call_rvalue.depth, call_rvalue.slot),
+                                                          ', '.join(args)))
+                self.emit('return (None,)' if self.returns_tuple else 'return None')
+            return
+        value = 'None'
+        if return_stmt.return_expr != None:
+            value = self.expr(return_stmt.return_expr)
+        self.emit(('return (%s,)' if self.returns_tuple else 'return %s') % value)
+
+    def visit_while_stmt(self, while_stmt):
+        self.emit('while %s:' % self.expr(while_stmt.bool_expr))
+        self.loops += 1
+        self.block(while_stmt.stmt_list)
+        self.loops -= 1
+
+    def visit_if_stmt(self, if_stmt):
+        self.emit('if %s:' % self.expr(if_stmt.if_part.bool_expr))
+        self.block(if_stmt.if_part.stmt_list)
+        for basic_if in if_stmt.elseifs:
+            self.emit('elif %s:' % self.expr(basic_if.bool_expr))
+            self.block(basic_if.stmt_list)
+        if if_stmt.has_else:
+            self.emit('else:')
+            self.block(if_stmt.else_stmts)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        operands = []
+        while isinstance(complex_expr, ast.ComplexExpr):
+            operands.append((self.expr(complex_expr.first_operand), operators.SYMBOLS[complex_expr.op]))
+            complex_expr = complex_expr.rest
+        source = self.expr(complex_expr)
+        for operand, op in reversed(operands):
+            source = '(%s %s %s)' % (operand, op, source)
+        self.source = source
+
+    def visit_bool_expr(self, bool_expr):
+        # (term, connector, whether the terms after it are safe)
+        terms = []
+        while True:
+            lhs = self.expr(bool_expr.first_expr)
+            if bool_expr.bool_rel != None:
+                op = operators.SYMBOLS[bool_expr.op]
+                term = '(%s %s %s)' % (lhs, op, self.expr(bool_expr.second_expr))
+                lhs_type, rhs_type = self.type_of(bool_expr.first_expr), self.type_of(bool_expr.second_expr)
+                safe = (self.safe(bool_expr.first_expr) and self.safe(bool_expr.second_expr) and
+                        (op in ('==', '!=') or lhs_type in NUMBERS and rhs_type in NUMBERS or
+                         lhs_type is str and rhs_type is str))
+            else:
+                if self.type_of(bool_expr.first_expr) is bool:
+                    term = lhs
+                else:
+                    term = '(%s == True)' % lhs
+                safe = self.safe(bool_expr.first_expr)
+            if bool_expr.negated:
+                term = '(not %s)' % term
+            terms.append((term, safe, bool_expr.bool_connector))
+            if bool_expr.bool_connector == None:
+                break
+            bool_expr = bool_expr.rest
+        term, safe, connector = terms.pop()
+        for lhs, lhs_safe, connector in reversed(terms):
+            if safe or not self.eager:
+                op = connector.lexeme
+            else:
+                op = '&' if connector.lexeme == 'and' else '|'
+            term = '(%s %s %s)' % (lhs, op, term)
+            safe = safe and lhs_safe
+        self.source = term
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.const is not None:
+            self.source = repr(self.literals[simple_rvalue.const])
+        else:
+            self.source = self.var(simple_rvalue.depth, simple_rvalue.slot)
+
+    def visit_new_rvalue(self, new_rvalue):
+        self.source = 'new(%s)' % self.var(new_rvalue.depth, new_rvalue.slot)
+
+    def visit_call_rvalue(self, call_rvalue):
+        args = [self.expr(x) for x in call_rvalue.args]
+        name = call_rvalue.fun.lexeme
+        built_in = builtins.BUILT_INS.get(name)
+        if (built_in is not None and built_in.function in NIL_CHECKED and
+                self.type_of(call_rvalue.args[0]) is int):
+            self.source = '%s(%s)' % (NIL_CHECKED[built_in.function], args[0])
+        elif built_in is not None:
+            if built_in.located:
+                the_token = resolver.error_token(call_rvalue)
+                args += [str(the_token.line), str(the_token.column)]
+            self.source = '%s(%s)' % (transpiler.built_in_name(name), ', '.join(args))
+        elif self.direct and self.recursive(call_rvalue):
+            self.source = '%s(jit, g, %s)' % (self.recursion[2], ', '.join(args))
+        else:
+            self.source = 'call(%s, (%s))' % (self.var(call_rvalue.depth, call_rvalue.slot),
+                                              ''.join(x + ', ' for x in args))
+
+    def visit_id_rvalue(self, id_rvalue):
+        source = self.var(id_rvalue.depth, id_rvalue.slot)
+        for i in id_rvalue.fields or ():
+            source = '%s[%i]' % (source, i)
+        self.source = source
+
+
+def infer_types(types, stores, specializer):
+    """Adds the types of the variables stored to in a region to types,
+    leaving a variable out (None) if it is given values of different or
+    unknown types"""
+    changed = True
+    while changed:
+        changed = False
+        for slot, expr in stores:
+            value_type = specializer.type_of(expr)
+            if slot not in types:
+                types[slot] = value_type
+                changed = True
+            elif types[slot] is not None and types[slot] is not value_type:
+                types[slot] = None
+                changed = True
+    for slot in [slot for slot, value_type in types.items() if value_type is None]:
+        del types[slot]
+
+def _build(name, params, prologue, body, epilogue):
+    lines = ['def %s(%s):' % (name, ', '.join(params))]
+    lines += ['    ' + line for line in prologue]
+    lines += body
+    lines += ['    ' + line for line in epilogue]
+    # the generated code calls built-in functions by the names the
+    # transpiler gives them
+    namespace = {transpiler.built_in_name(x.name): x.function for x in builtins.BUILT_INS.values()}
+    exec(compile('\n'.join(lines) + '\n', '<mypl jit>', 'exec'), namespace)
+    return namespace[name]
+
+def compile_function(fun_decl, signature, literals, eager=False):
+    """Returns a Python function(jit, declaring frame, *args) running
+    fun_decl for arguments of the types in signature. literals is the
+    program's constant pool, and eager is as for Interpreter."""
+    region = Region()
+    fun_decl.stmt_list.accept(region)
+    cached = set(slot for depth, slot in region.refs if depth == 0) | set(x.slot for x in fun_decl.params)
+    types = dict(zip((x.slot for x in fun_decl.params), signature))
+    name = 'fun_%i' % fun_decl.slot
+    specializer = Specializer(literals, types, cached, False, (fun_decl, signature, name), eager)
+    infer_types(types, region.stores, specializer)
+    specializer.direct = all(not in_loop and specializer.recursive(call_rvalue)
+                             for call_rvalue, in_loop in region.tail_calls)
+    # the body runs in a while True loop, tail calls to itself continuing it
+    specializer.block(fun_decl.stmt_list)
+    params = ['jit', 'g'] + ['v%i' % x.slot for x in fun_decl.params]
+    prologue = ['call = jit.call', 'new = jit.new_struct', 'while True:']
+    return _build(name, params, prologue, specializer.lines, ['    return None'])
+
+def compile_loop(while_stmt, region, live, cached, signature, literals, eager=False):
+    """Returns a Python function(jit, frame) running while_stmt from its
+    test for loop variables (live) of the types in signature, returning a
+    1-tuple holding the value if the loop returns"""
+    types = dict(zip(live, signature))
+    specializer = Specializer(literals, types, cached, True, eager=eager)
+    infer_types(types, region.stores, specializer)
+    while_stmt.accept(specializer)
+    prologue = ['call = jit.call', 'new = jit.new_struct', 'g = frame[0]']
+    prologue += ['v%i = frame[%i]' % (slot, slot) for slot in live]
+    stored = set(slot for slot, expr in region.stores)
+    epilogue = ['frame[%i] = v%i' % (slot, slot) for slot in live if slot in stored]
+    body = while_stmt.stmt_list
+    if body.scope_start is not None:
+        epilogue.append('frame[%i:%i] = %r' % (body.scope_start, body.scope_end,
+                                               [None] * (body.scope_end - body.scope_start)))
+    return _build('loop_%i' % _line(while_stmt.bool_expr), ['jit', 'frame'], prologue, specializer.lines, epilogue)
+
+def _line(bool_expr):
+    """a line number for a loop, from its condition"""
+    expr = bool_expr.first_expr
+    while isinstance(expr, ast.ComplexExpr):
+        expr = expr.first_operand
+    if isinstance(expr, ast.SimpleExpr):
+        expr = expr.term
+    if isinstance(expr, ast.SimpleRValue):
+        return expr.val.line
+    if isinstance(expr, ast.CallRValue):
+        return expr.fun.line
+    if isinstance(expr, ast.NewRValue):
+        return expr.struct_type.line
+    return expr.path[0].line
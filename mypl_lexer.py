@@ -1,235 +1,510 @@
-import mypl_token as token
-import mypl_error as error
-class Lexer(object):
-    def __init__(self, input_stream):
-        self.line = 1
-        self.column = 1
-        self.input_stream = input_stream
-
-    def __peek(self):
-        pos = self.input_stream.tell()
-        symbol = self.input_stream.read(1)
-        self.input_stream.seek(pos)
-        return symbol
-
-    def __read(self):
-        return self.input_stream.read(1)
-
-    def next_token(self):
-        input = ""
-        oldLine = self.line
-        oldColumn = self.column
-        temp = ""
-        inputType = ""
-        intFloatOrString = 0 #1 if input is a number, 2 if float, 3 if string, 0 otherwise
-        checker = True
-        keepLooping = True
-        noSpaceSymbols = ['.', '<=', '>=', '==', '!=', '*',':', '/', '!', '+', '-', ';', '=', ')', '(', '<', '>', ',', '%'] #list of symbols that dont need whitesaces
-        comparisonsOp = ['<=', '>=', '==', '!=', '<', '>'] #list of comparisons
-
-        #take care of whitespace
-        while self.__peek().isspace(): # == " " or self.__peek() == '\n' or self.__peek == '\t':
-            temp = self.__read()
-            self.column += 1
-            oldColumn = self.column
-        while self.__peek() == '\n':
-            temp = self.__read()
-            self.column += 1
-            oldColumn = self.column
-
-        
-        while self.__peek() !=  " " and self.__peek() != "" and self.__peek() != '\n' and not self.__peek().isspace() and keepLooping:
-            #token is a string
-            if self.__peek() == '"' or self.__peek() == "'": 
-                isSingle = True;
-                if self.__peek() == '"':
-                    isSingle = False
-                temp = self.__read()
-                self.column += 1
-                while (self.__peek() != "'" and self.__peek() != '"') or ((self.__peek() != "'" or not isSingle) and (self.__peek() != '"' or isSingle)):
-                    input += self.__read()
-                    if self.__peek() == '\n':
-                        raise error.MyPLError("uh oh, you had a new line in a string ", self.line, self.column)
-                    self.column += 1
-                temp = self.__read()
-                self.column += 1
-                intFloatOrString = 3
-                keepLooping = False
-            #token is not a string               
-            #print(self.column)
-            #reads the next character   
-            if keepLooping:
-                input += self.__read()
-                #what to do for comments
-                if input == '#':
-                    while self.__peek() != '\n':
-                        input = self.__read()
-                    input = ""
-                    temp == self.__read()
-                    while self.__peek() == " " or self.__peek().isspace():
-                        temp = self.__read()
-                    while self.__peek() == '\n':
-                        temp = self.__read()
-                    self.line += 1
-                    self.column = 1
-                    oldLine = self.line
-                    oldColumn = self.column
-                #bad number checking for number preceded by 0
-                if input == '0' and self.__peek().isdigit():
-                    m = 'unexpected symbol "%s" at: ' %self.__peek()
-                    raise error.MyPLError(m, self.line, self.column)
-                #bad number checking for digit followed by alphabetical letter
-                if input.isdigit() and self.__peek().isalpha():   
-                    temp = self.__read()
-                    m = 'unexpected symbol "%s" at:' % temp
-                    raise error.MyPLError(m, self.line, self.column)
-                     
-                checker = True
-                if self.__peek() == '.' and input.isdigit():
-                    checker = False
-                #checking for operators 
-                if checker == True:
-                    if (input in noSpaceSymbols or self.__peek() in noSpaceSymbols) and input != "":
-                        if input == '!' and self.__peek() != '=':
-                            raise error.MyPLError("extra exclamation mark at ", self.line, self.column)
-                        temp = input + self.__peek()
-                        if len(input) == 1:
-                            if temp != '!=' and temp != '==':
-                                if input in comparisonsOp:
-                                    if self.__peek() in comparisonsOp == False:
-                                        keepLooping = False
-                                else:
-                                    keepLooping = False
-                        else:
-                            keepLooping = False
-                 
-                    
-                #increment column count
-                self.column += 1
-        if intFloatOrString != 3:
-            #checks to see if the input is an int
-            if(input.isdigit()):   
-                intFloatOrString = 1
-            #checks to see if it is a double
-            else:
-                soFarSoGood = True   #bool that checks to see if there are any alphabetical characters
-                numberOfDots = 0   #keeps track of the dots
-                if len(input) > 1:
-                    for i, x in enumerate(input):
-                        if x == '.':
-                            numberOfDots += 1
-                            #float error where there is nothing after the 
-                            if i + 1 == len(input):     
-                                m = input + "missing digit in float value at "
-                                raise error.MyPLError(m, self.line, self.column)
-                            #float error where there is an invalid number after the dot
-                                #pre dot invalid number checking is taken care of up above
-                            elif input[i+1].isdigit() == False and soFarSoGood:   
-                                m = 'unexpected character "%s" at ' % (self.__peek())
-                                raise error.MyPLError(m, self.line, self.column)
-                        elif x.isdigit() == False:
-                            soFarSoGood = False
-                if soFarSoGood and numberOfDots == 1:
-                    intFloatOrString = 2
-        #end of the line
-        if self.__peek() == '\n':
-            self.line += 1
-            self.column = 1;
-            temp = self.__read()
-        #input was a int float or string
-        if intFloatOrString != 0:
-            if intFloatOrString == 1:
-                inputType = token.INTVAL
-            elif intFloatOrString == 2:
-                inputType = token.FLOATVAL
-            else:
-                inputType = token.STRINGVAL
-        #input was not a value except for maybe a bool
-        else:
-            if input == '=':
-                inputType = token.ASSIGN
-            elif input == ',':
-                inputType = token.COMMA
-            elif input == ':':
-                inputType = token.COLON
-            elif input == '/':
-                inputType = token.DIVIDE
-            elif input == '.':
-                inputType = token.DOT
-            elif input == '==':
-                inputType = token.EQUAL
-            elif input == '':
-                oldColumn -= 1
-                inputType = token.EOS
-            elif input == '>':
-                inputType = token.GREATER_THAN
-            elif input == '>=':
-                inputType = token.GREATER_THAN_EQUAL
-            elif input == '<':
-                inputType = token.LESS_THAN
-            elif input == '<=':
-                inputType = token.LESS_THAN_EQUAL
-            elif input == '!=':
-                inputType = token.NOT_EQUAL
-            elif input == '(':
-                inputType = token.LPAREN
-            elif input == ')':
-                inputType = token.RPAREN
-            elif input == '-':
-                inputType = token.MINUS
-            elif input == '%':
-                inputType = token.MODULO
-            elif input == '*':
-                inputType = token.MULTIPLY
-            elif input == '+':
-                inputType = token.PLUS
-            elif input == ';':
-                inputType = token.SEMICOLON
-            elif input == 'bool':
-                inputType = token.BOOLTYPE
-            elif input == 'int':
-                inputType = token.INTTYPE
-            elif input == 'float':
-                inputType = token.FLOATTYPE
-            elif input == 'string':
-                inputType = token.STRINGTYPE
-            elif input == 'struct':
-                inputType = token.STRUCTTYPE
-            elif input == 'and':
-                inputType = token.AND
-            elif input == 'or':
-                inputType = token.OR
-            elif input == 'not':
-                inputType = token.NOT
-            elif input == 'while':
-                inputType = token.WHILE
-            elif input == 'do':
-                inputType = token.DO
-            elif input == 'if':
-                inputType = token.IF
-            elif input == 'then':
-                inputType = token.THEN
-            elif input == 'else':
-                inputType = token.ELSE
-            elif input == 'elif':
-                inputType = token.ELIF
-            elif input == 'end':
-                inputType = token.END
-            elif input == 'fun':
-                inputType = token.FUN
-            elif input == 'var':
-                inputType = token.VAR
-            elif input == 'set':
-                inputType = token.SET
-            elif input == 'return':
-                inputType = token.RETURN
-            elif input == 'new':
-                inputType = token.NEW
-            elif input == 'false' or input == 'true':
-                inputType = token.BOOLVAL
-            elif input == 'nil':
-                inputType = token.NIL
-            else:
-                inputType = token.ID
-        newToken = token.Token(inputType, input, oldLine, oldColumn)
-        return newToken
+import mypl_token as token
+import mypl_error as error
+import mmap
+import re
+import sys
+
+class Lexer(object):
+    def __init__(self, input_stream):
+        self.line = 1
+        self.column = 1
+        self.input_stream = input_stream
+
+    def __peek(self):
+        pos = self.input_stream.tell()
+        symbol = self.input_stream.read(1)
+        self.input_stream.seek(pos)
+        return symbol
+
+    def __read(self):
+        return self.input_stream.read(1)
+
+    def next_token(self):
+        input = ""
+        oldLine = self.line
+        oldColumn = self.column
+        temp = ""
+        inputType = ""
+        intFloatOrString = 0 #1 if input is a number, 2 if float, 3 if string, 0 otherwise
+        checker = True
+        keepLooping = True
+        noSpaceSymbols = ['.', '<=', '>=', '==', '!=', '*',':', '/', '!', '+', '-', ';', '=', ')', '(', '<', '>', ',', '%'] #list of symbols that dont need whitesaces
+        comparisonsOp = ['<=', '>=', '==', '!=', '<', '>'] #list of comparisons
+
+        #take care of whitespace
+        while self.__peek().isspace(): # == " " or self.__peek() == '\n' or self.__peek == '\t':
+            temp = self.__read()
+            self.column += 1
+            oldColumn = self.column
+        while self.__peek() == '\n':
+            temp = self.__read()
+            self.column += 1
+            oldColumn = self.column
+
+        
+        while self.__peek() !=  " " and self.__peek() != "" and self.__peek() != '\n' and not self.__peek().isspace() and keepLooping:
+            #token is a string
+            if self.__peek() == '"' or self.__peek() == "'": 
+                isSingle = True;
+                if self.__peek() == '"':
+                    isSingle = False
+                temp = self.__read()
+                self.column += 1
+                while (self.__peek() != "'" and self.__peek() != '"') or ((self.__peek() != "'" or not isSingle) and (self.__peek() != '"' or isSingle)):
+                    input += self.__read()
+                    if self.__peek() == '\n':
+                        raise error.MyPLError("uh oh, you had a new line in a string ", self.line, self.column)
+                    self.column += 1
+                temp = self.__read()
+                self.column += 1
+                intFloatOrString = 3
+                keepLooping = False
+            #token is not a string               
+            #print(self.column)
+            #reads the next character   
+            if keepLooping:
+                input += self.__read()
+                #what to do for comments
+                if input == '#':
+                    while self.__peek() != '\n':
+                        input = self.__read()
+                    input = ""
+                    temp == self.__read()
+                    while self.__peek() == " " or self.__peek().isspace():
+                        temp = self.__read()
+                    while self.__peek() == '\n':
+                        temp = self.__read()
+                    self.line += 1
+                    self.column = 1
+                    oldLine = self.line
+                    oldColumn = self.column
+                #bad number checking for number preceded by 0
+                if input == '0' and self.__peek().isdigit():
+                    m = 'unexpected symbol "%s" at: ' %self.__peek()
+                    raise error.MyPLError(m, self.line, self.column)
+                #bad number checking for digit followed by alphabetical letter
+                if input.isdigit() and self.__peek().isalpha():   
+                    temp = self.__read()
+                    m = 'unexpected symbol "%s" at:' % temp
+                    raise error.MyPLError(m, self.line, self.column)
+                     
+                checker = True
+                if self.__peek() == '.' and input.isdigit():
+                    checker = False
+                #checking for operators 
+                if checker == True:
+                    if (input in noSpaceSymbols or self.__peek() in noSpaceSymbols) and input != "":
+                        if input == '!' and self.__peek() != '=':
+                            raise error.MyPLError("extra exclamation mark at ", self.line, self.column)
+                        temp = input + self.__peek()
+                        if len(input) == 1:
+                            if temp != '!=' and temp != '==':
+                                if input in comparisonsOp:
+                                    if self.__peek() in comparisonsOp == False:
+                                        keepLooping = False
+                                else:
+                                    keepLooping = False
+                        else:
+                            keepLooping = False
+                 
+                    
+                #increment column count
+                self.column += 1
+        if intFloatOrString != 3:
+            #checks to see if the input is an int
+            if(input.isdigit()):   
+                intFloatOrString = 1
+            #checks to see if it is a double
+            else:
+                soFarSoGood = True   #bool that checks to see if there are any alphabetical characters
+                numberOfDots = 0   #keeps track of the dots
+                if len(input) > 1:
+                    for i, x in enumerate(input):
+                        if x == '.':
+                            numberOfDots += 1
+                            #float error where there is nothing after the 
+                            if i + 1 == len(input):     
+                                m = input + "missing digit in float value at "
+                                raise error.MyPLError(m, self.line, self.column)
+                            #float error where there is an invalid number after the dot
+                                #pre dot invalid number checking is taken care of up above
+                            elif input[i+1].isdigit() == False and soFarSoGood:   
+                                m = 'unexpected character "%s" at ' % (self.__peek())
+                                raise error.MyPLError(m, self.line, self.column)
+                        elif x.isdigit() == False:
+                            soFarSoGood = False
+                if soFarSoGood and numberOfDots == 1:
+                    intFloatOrString = 2
+        #end of the line
+        if self.__peek() == '\n':
+            self.line += 1
+            self.column = 1;
+            temp = self.__read()
+        #input was a int float or string
+        if intFloatOrString != 0:
+            if intFloatOrString == 1:
+                inputType = token.INTVAL
+            elif intFloatOrString == 2:
+                inputType = token.FLOATVAL
+            else:
+                inputType = token.STRINGVAL
+        #input was not a value except for maybe a bool
+        else:
+            if input == '=':
+                inputType = token.ASSIGN
+            elif input == ',':
+                inputType = token.COMMA
+            elif input == ':':
+                inputType = token.COLON
+            elif input == '/':
+                inputType = token.DIVIDE
+            elif input == '.':
+                inputType = token.DOT
+            elif input == '==':
+                inputType = token.EQUAL
+            elif input == '':
+                oldColumn -= 1
+                inputType = token.EOS
+            elif input == '>':
+                inputType = token.GREATER_THAN
+            elif input == '>=':
+                inputType = token.GREATER_THAN_EQUAL
+            elif input == '<':
+                inputType = token.LESS_THAN
+            elif input == '<=':
+                inputType = token.LESS_THAN_EQUAL
+            elif input == '!=':
+                inputType = token.NOT_EQUAL
+            elif input == '(':
+                inputType = token.LPAREN
+            elif input == ')':
+                inputType = token.RPAREN
+            elif input == '-':
+                inputType = token.MINUS
+            elif input == '%':
+                inputType = token.MODULO
+            elif input == '*':
+                inputType = token.MULTIPLY
+            elif input == '+':
+                inputType = token.PLUS
+            elif input == ';':
+                inputType = token.SEMICOLON
+            elif input == 'bool':
+                inputType = token.BOOLTYPE
+            elif input == 'int':
+                inputType = token.INTTYPE
+            elif input == 'float':
+                inputType = token.FLOATTYPE
+            elif input == 'string':
+                inputType = token.STRINGTYPE
+            elif input == 'struct':
+                inputType = token.STRUCTTYPE
+            elif input == 'and':
+                inputType = token.AND
+            elif input == 'or':
+                inputType = token.OR
+            elif input == 'not':
+                inputType = token.NOT
+            elif input == 'while':
+                inputType = token.WHILE
+            elif input == 'do':
+                inputType = token.DO
+            elif input == 'if':
+                inputType = token.IF
+            elif input == 'then':
+                inputType = token.THEN
+            elif input == 'else':
+                inputType = token.ELSE
+            elif input == 'elif':
+                inputType = token.ELIF
+            elif input == 'end':
+                inputType = token.END
+            elif input == 'fun':
+                inputType = token.FUN
+            elif input == 'var':
+                inputType = token.VAR
+            elif input == 'set':
+                inputType = token.SET
+            elif input == 'return':
+                inputType = token.RETURN
+            elif input == 'new':
+                inputType = token.NEW
+            elif input == 'false' or input == 'true':
+                inputType = token.BOOLVAL
+            elif input == 'nil':
+                inputType = token.NIL
+            else:
+                inputType = token.ID
+        newToken = token.Token(inputType, input, oldLine, oldColumn)
+        return newToken
+
+
+# keyword lexemes -> token type
+KEYWORDS = {
+    'bool': token.BOOLTYPE, 'int': token.INTTYPE, 'float': token.FLOATTYPE,
+    'string': token.STRINGTYPE, 'struct': token.STRUCTTYPE, 'and': token.AND,
+    'or': token.OR, 'not': token.NOT, 'while': token.WHILE, 'do': token.DO,
+    'if': token.IF, 'then': token.THEN, 'else': token.ELSE, 'elif': token.ELIF,
+    'end': token.END, 'fun': token.FUN, 'var': token.VAR, 'set': token.SET,
+    'return': token.RETURN, 'new': token.NEW, 'false': token.BOOLVAL,
+    'true': token.BOOLVAL, 'nil': token.NIL,
+}
+
+# operator lexemes -> token type
+SYMBOLS = {
+    '=': token.ASSIGN, ',': token.COMMA, ':': token.COLON, '/': token.DIVIDE,
+    '.': token.DOT, '==': token.EQUAL, '>': token.GREATER_THAN,
+    '>=': token.GREATER_THAN_EQUAL, '<': token.LESS_THAN,
+    '<=': token.LESS_THAN_EQUAL, '!=': token.NOT_EQUAL, '(': token.LPAREN,
+    ')': token.RPAREN, '-': token.MINUS, '%': token.MODULO,
+    '*': token.MULTIPLY, '+': token.PLUS, ';': token.SEMICOLON,
+}
+
+# the common token shapes; anything else (and any lookahead these patterns
+# don't accept) is handed to the character-by-character fallback so that
+# the odd corners of Lexer are reproduced exactly
+_SPACE_RE = re.compile(r'\s*')
+_TOKEN_RE = re.compile(r"""
+    (?P<ID>[A-Za-z_][^\s"'.*:/!+\-;=()<>,%]*)(?=[\s.*:/!+\-;=()<>,%]|\Z)
+  | (?P<FLOATVAL>(?:0|[1-9][0-9]*)\.[0-9]+)(?=[\s.*:/!+\-;=()<>,%]|\Z)
+  | (?P<INTVAL>0|[1-9][0-9]*)(?=[\s*:/!+\-;=()<>,%]|\Z)
+  | "(?P<DSTRING>[^"\n]*)"
+  | '(?P<SSTRING>[^'\n]*)'
+  | (?P<SYMBOL>[<>=!]=|[<>](?=\s|\Z)|[.*:/+\-;=(),%])
+  | (?P<COMMENT>\#)[^\n]*
+""", re.VERBOSE)
+
+# the same patterns over UTF-8 bytes; only ASCII is matched here (str.isspace
+# also accepts \x1c-\x1f), everything else goes through the fallback
+_BYTES_SPACE_RE = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]*')
+_BYTES_TOKEN_RE = re.compile(rb"""
+    (?P<ID>[A-Za-z_][^ \t\n\r\x0b\x0c\x1c-\x1f"'.*:/!+\-;=()<>,%\x80-\xff]*)
+        (?=[ \t\n\r\x0b\x0c\x1c-\x1f.*:/!+\-;=()<>,%]|\Z)
+  | (?P<FLOATVAL>(?:0|[1-9][0-9]*)\.[0-9]+)(?=[ \t\n\r\x0b\x0c\x1c-\x1f.*:/!+\-;=()<>,%]|\Z)
+  | (?P<INTVAL>0|[1-9][0-9]*)(?=[ \t\n\r\x0b\x0c\x1c-\x1f*:/!+\-;=()<>,%]|\Z)
+  | "(?P<DSTRING>[^"\n]*)"
+  | '(?P<SSTRING>[^'\n]*)'
+  | (?P<SYMBOL>[<>=!]=|[<>](?=[ \t\n\r\x0b\x0c\x1c-\x1f]|\Z)|[.*:/+\-;=(),%])
+  | (?P<COMMENT>\#)[^\n]*
+""", re.VERBOSE)
+
+
+class BufferedLexer(Lexer):
+    """A lexer that reads the whole source up front and matches tokens with
+    compiled patterns and a keyword table. It produces the same tokens (and
+    line/column positions) as Lexer."""
+
+    space_re = _SPACE_RE
+    token_re = _TOKEN_RE
+    newline = '\n'
+
+    def __init__(self, input_stream):
+        self._start(input_stream.read())
+
+    def _start(self, text):
+        self.line = 1
+        self.column = 1
+        self.text = text
+        self.pos = 0
+        self.input_stream = None
+        # source spelling -> (tokentype, lexeme) for keywords, ids and symbols
+        self.names = {}
+        for lexeme, tokentype in SYMBOLS.items():
+            self.names[self._encode(lexeme)] = (tokentype, lexeme)
+
+    def _encode(self, lexeme):
+        return lexeme
+
+    def _slice(self, start, end):
+        return self.text[start:end]
+
+    def _decode(self, piece):
+        return piece
+
+    def _cursor(self):
+        return _TextCursor(self.text, self.pos)
+
+    def next_token(self):
+        text = self.text
+        pos = self.pos
+        line = self.line
+        column = self.column
+        # skip whitespace (newlines here only move the column, as in Lexer)
+        end = self.space_re.match(text, pos).end()
+        column += end - pos
+        pos = end
+        start_column = column
+        while True:
+            if pos >= len(text):
+                self.pos, self.line, self.column = pos, line, column
+                return token.Token(token.EOS, '', line, start_column - 1)
+            m = self.token_re.match(text, pos)
+            if m is None:
+                return self.__fallback()
+            kind = m.lastgroup
+            if kind != 'COMMENT':
+                break
+            # a comment runs to the newline, which is skipped together with
+            # any whitespace after it and counts as a single line
+            pos = self.space_re.match(text, m.end()).end()
+            line += 1
+            column = 2
+            start_column = 1
+        end = m.end()
+        if kind == 'DSTRING' or kind == 'SSTRING':
+            tokentype = token.STRINGVAL
+            lexeme = self._decode(self._slice(m.start(kind), m.end(kind)))
+            column += len(lexeme) + 2
+        else:
+            piece = self._slice(pos, end)
+            entry = self.names.get(piece)
+            if entry is None:
+                lexeme = self._decode(piece)
+                if kind == 'ID':
+                    lexeme = sys.intern(lexeme)
+                    entry = (KEYWORDS.get(lexeme, token.ID), lexeme)
+                else:
+                    entry = (kind, lexeme)
+                self.names[self._encode(lexeme)] = entry
+            tokentype, lexeme = entry
+            column += end - pos
+        if text[end:end + 1] == self.newline:
+            end += 1
+            self.line = line + 1
+            self.column = 1
+        else:
+            self.line = line
+            self.column = column
+        self.pos = end
+        return token.Token(tokentype, lexeme, line, start_column)
+
+    def __fallback(self):
+        """Lexes the next token one character at a time with
+        Lexer.next_token, starting from the current (saved) position."""
+        self.input_stream = self._cursor()
+        try:
+            return Lexer.next_token(self)
+        except _EndOfInput:
+            raise error.MyPLError("unexpected end of file", self.line, self.column)
+        finally:
+            self.pos = self.input_stream.pos
+            self.input_stream = None
+
+
+class MappedLexer(BufferedLexer):
+    """A BufferedLexer over UTF-8 encoded bytes, typically an mmap of the
+    source file. Lexemes are sliced out of the buffer without copying it and
+    only decoded when a token is built (ids and keywords once per spelling),
+    so memory use doesn't grow with the size of the file."""
+
+    space_re = _BYTES_SPACE_RE
+    token_re = _BYTES_TOKEN_RE
+    newline = b'\n'
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if not view.readonly:
+            # lexeme slices are used as dict keys, which needs a read-only view
+            view = memoryview(bytes(buffer))
+        self._start(view)
+
+    def _encode(self, lexeme):
+        return lexeme.encode('utf-8')
+
+    def _decode(self, piece):
+        return str(piece, 'utf-8')
+
+    def _cursor(self):
+        return _BytesCursor(self.text, self.pos)
+
+    def close(self):
+        self.text.release()
+
+
+def open_mapped(filename):
+    """Returns a MappedLexer over a read-only memory map of filename."""
+    with open(filename, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            buffer = b''
+    return MappedLexer(buffer)
+
+
+class BufferLexer(object):
+    """Replays the tokens in a TokenBuffer through next_token."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.index = 0
+
+    def next_token(self):
+        the_token = self.buffer.token(self.index)
+        if self.index < len(self.buffer) - 1:
+            self.index += 1
+        return the_token
+
+
+def tokenize(the_lexer):
+    """Returns a TokenBuffer with all of the_lexer's tokens up to and
+    including EOS."""
+    buffer = token.TokenBuffer()
+    while True:
+        the_token = the_lexer.next_token()
+        buffer.append(the_token)
+        if the_token.tokentype == token.EOS:
+            return buffer
+
+
+class _EndOfInput(Exception): pass
+
+class _TextCursor(object):
+    """A tell/read/seek view over an in-memory string for Lexer's
+    character-at-a-time code. Lexer loops forever when a string or comment
+    runs into the end of the file, so reading past the end twice without
+    a seek (i.e. not just peeking) raises _EndOfInput instead."""
+
+    def __init__(self, text, pos):
+        self.text = text
+        self.pos = pos
+        self.at_end = False
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, pos):
+        self.pos = pos
+        self.at_end = False
+
+    def read(self, size):
+        symbol = self.text[self.pos:self.pos + size]
+        if symbol == '':
+            if self.at_end:
+                raise _EndOfInput()
+            self.at_end = True
+        self.pos += len(symbol)
+        return symbol
+
+class _BytesCursor(_TextCursor):
+    """A _TextCursor over UTF-8 bytes: positions are byte offsets and each
+    read(1) decodes one whole character."""
+
+    def read(self, size):
+        pos = self.pos
+        lead = self.text[pos] if pos < len(self.text) else 0
+        if lead < 0x80:
+            width = 1
+        elif lead < 0xe0:
+            width = 2
+        elif lead < 0xf0:
+            width = 3
+        else:
+            width = 4
+        symbol = str(self.text[pos:pos + width], 'utf-8')
+        if symbol == '':
+            if self.at_end:
+                raise _EndOfInput()
+            self.at_end = True
+        self.pos += len(symbol.encode('utf-8'))
+        return symbol
@@ -0,0 +1,31 @@
+import mypl_token as token
+import operator
+
+# The operations of ComplexExpr and BoolExpr nodes. The type checker picks
+# one per node from its operator and operand type and keeps its code in the
+# node's op field, so engines index OPERATIONS (or SYMBOLS, to generate
+# Python) instead of comparing lexemes each time the node is evaluated.
+
+ADD, CONCAT, SUB, MUL, DIV, INT_DIV, MOD, LT, LE, GT, GE, EQ, NE = range(13)
+
+OPERATIONS = (operator.add, operator.concat, operator.sub, operator.mul,
+              operator.truediv, operator.floordiv, operator.mod, operator.lt,
+              operator.le, operator.gt, operator.ge, operator.eq, operator.ne)
+# the Python operator of each operation
+SYMBOLS = ('+', '+', '-', '*', '/', '//', '%', '<', '<=', '>', '>=', '==', '!=')
+
+MATH = {'+': ADD, '-': SUB, '*': MUL, '/': DIV, '%': MOD}
+REL = {'<': LT, '<=': LE, '>': GT, '>=': GE, '==': EQ, '!=': NE}
+
+def math_op(lexeme, operand_type):
+    """The operation of a math operator on two operands of operand_type (a
+    value token type): / on ints divides to an int, + on strings joins them"""
+    op = MATH[lexeme]
+    if op == DIV and operand_type == token.INTVAL:
+        return INT_DIV
+    if op == ADD and operand_type == token.STRINGVAL:
+        return CONCAT
+    return op
+
+def rel_op(lexeme):
+    return REL[lexeme]
@@ -0,0 +1,451 @@
+import mypl_token as token
+import mypl_ast as ast
+import mypl_operators as operators
+import mypl_resolver as resolver
+import math
+
+# AST-to-AST passes over a checked program, run before it is resolved.
+# Every pass keeps what the program prints and the errors it stops with;
+# operations are computed with the mypl_operators function the type
+# checker picked, so / still divides ints to an int.
+
+class Pass(ast.Visitor):
+    """Walks a whole program, statements and expressions, for passes to
+    override the nodes they change. A pass is made with the program's
+    StmtList and the eager flag of the engines that will run it (see
+    Interpreter) and applied by run()."""
+
+    def __init__(self, stmt_list, eager=False):
+        self.program = stmt_list
+        self.eager = eager
+
+    def run(self):
+        self.program.accept(self)
+
+    def visit_stmt_list(self, stmt_list):
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+
+    def visit_expr_stmt(self, expr_stmt):
+        expr_stmt.expr.accept(self)
+
+    def visit_var_decl_stmt(self, var_decl):
+        var_decl.var_expr.accept(self)
+
+    def visit_assign_stmt(self, assign_stmt):
+        assign_stmt.rhs.accept(self)
+        assign_stmt.lhs.accept(self)
+
+    def visit_struct_decl_stmt(self, struct_decl):
+        for var_decl in struct_decl.var_decls:
+            var_decl.accept(self)
+
+    def visit_fun_decl_stmt(self, fun_decl):
+        fun_decl.stmt_list.accept(self)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.return_expr != None:
+            return_stmt.return_expr.accept(self)
+
+    def visit_while_stmt(self, while_stmt):
+        while_stmt.bool_expr.accept(self)
+        while_stmt.stmt_list.accept(self)
+
+    def visit_if_stmt(self, if_stmt):
+        for basic_if in [if_stmt.if_part] + if_stmt.elseifs:
+            basic_if.bool_expr.accept(self)
+            basic_if.stmt_list.accept(self)
+        if if_stmt.has_else:
+            if_stmt.else_stmts.accept(self)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        while isinstance(complex_expr, ast.ComplexExpr):
+            complex_expr.first_operand.accept(self)
+            complex_expr = complex_expr.rest
+        complex_expr.accept(self)
+
+    def visit_bool_expr(self, bool_expr):
+        while bool_expr is not None:
+            bool_expr.first_expr.accept(self)
+            if bool_expr.bool_rel != None:
+                bool_expr.second_expr.accept(self)
+            bool_expr = bool_expr.rest
+
+    def visit_call_rvalue(self, call_rvalue):
+        for arg in call_rvalue.args:
+            arg.accept(self)
+
+
+class ConstantFolder(Pass):
+    """Replaces math on literals by its result and conditions on literals by
+    true or false. ComplexExpr chains nest to the right, so the literal
+    tail of a chain folds (x + 2 * 3 becomes x + 6, 2 * 3 + x does not
+    change). Operations that would fail (such as dividing by zero) are
+    left to fail when they run. A literal and/or operand that decides the
+    condition drops the other side only when that side is not evaluated
+    anyway: never with eager engines, unless it is a literal too."""
+
+    def __init__(self, stmt_list, eager=False):
+        Pass.__init__(self, stmt_list, eager)
+        self.constants = stmt_list.constants
+        # constant_key(value) -> position in constants
+        self.constant_index = {constant_key(value): i for i, value in enumerate(self.constants)}
+
+    def expr(self, expr):
+        """Returns expr folded"""
+        chain = []
+        while isinstance(expr, ast.ComplexExpr):
+            chain.append(expr)
+            expr = expr.rest
+        expr.term.accept(self)
+        result = expr
+        for node in reversed(chain):
+            node.first_operand.accept(self)
+            node.rest = result
+            operand = node.first_operand
+            if (isinstance(operand, ast.SimpleRValue) and operand.const is not None
+                    and resolver.literal(result)):
+                value = self.__compute(node.op, self.constants[operand.const],
+                                       self.constants[result.term.const])
+                if value is not None:
+                    # at the last operand, where built-ins report errors
+                    result = self.__literal(value, node.inferred_type, result.term.val)
+                    continue
+            result = node
+        return result
+
+    def bool_expr(self, bool_expr):
+        """Returns the BoolExpr bool_expr folded"""
+        chain = [bool_expr]
+        while chain[-1].bool_connector != None:
+            chain.append(chain[-1].rest)
+        result = None
+        for node in reversed(chain):
+            node.first_expr = self.expr(node.first_expr)
+            if node.bool_rel != None:
+                node.second_expr = self.expr(node.second_expr)
+            value = self.__condition(node)
+            if node.bool_connector == None:
+                result = node if value is None else self.__literal_condition(value, node)
+                continue
+            node.rest = result
+            rest_value = condition_value(result)
+            is_and = node.bool_connector.lexeme == 'and'
+            if value is not None and value == is_and:
+                # true and x, false or x: just x
+                pass
+            elif value is not None and (rest_value is not None or not self.eager):
+                # false and x, true or x: x is not evaluated
+                result = self.__literal_condition(value, node)
+            elif rest_value is not None and rest_value == is_and:
+                # x and true, x or false: just x
+                node.bool_connector = None
+                node.rest = None
+                result = node
+            else:
+                result = node
+        return result
+
+    def __compute(self, op, lhs, rhs):
+        # the value op gives, or None if it fails or has no literal
+        try:
+            value = operators.OPERATIONS[op](lhs, rhs)
+        except Exception:
+            return None
+        if type(value) is float and not math.isfinite(value):
+            return None
+        # huge ints are left to be computed, as their digits may be too
+        # many for repr
+        if type(value) is int and value.bit_length() > 64:
+            return None
+        return value
+
+    def __condition(self, bool_expr):
+        # True or False if bool_expr's own comparison (ignoring its
+        # connector) is of literals, otherwise None
+        if not resolver.literal(bool_expr.first_expr):
+            return None
+        lhs = self.constants[bool_expr.first_expr.term.const]
+        if bool_expr.bool_rel == None:
+            value = lhs == True
+        elif resolver.literal(bool_expr.second_expr):
+            value = self.__compute(bool_expr.op, lhs, self.constants[bool_expr.second_expr.term.const])
+            if value is None:
+                return None
+        else:
+            return None
+        return bool(value) != bool_expr.negated
+
+    def __constant(self, value):
+        key = constant_key(value)
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_index[key]
+
+    def __literal(self, value, type_name, position):
+        # a SimpleExpr of the literal value, its token at position
+        if type_name == token.STRINGVAL:
+            lexeme = value.replace('\n', r'\n')
+        elif type_name == token.BOOLVAL:
+            lexeme = 'true' if value else 'false'
+        else:
+            lexeme = repr(value)
+        rvalue = ast.SimpleRValue()
+        rvalue.val = token.Token(type_name, lexeme, position.line, position.column)
+        rvalue.const = self.__constant(value)
+        rvalue.inferred_type = type_name
+        expr = ast.SimpleExpr()
+        expr.term = rvalue
+        expr.inferred_type = type_name
+        return expr
+
+    def __literal_condition(self, value, bool_expr):
+        # a BoolExpr of just true or false, at bool_expr's first token
+        condition = ast.BoolExpr()
+        condition.first_expr = self.__literal(value, token.BOOLVAL, token_of(bool_expr.first_expr))
+        return condition
+
+    def visit_expr_stmt(self, expr_stmt):
+        expr_stmt.expr = self.expr(expr_stmt.expr)
+
+    def visit_var_decl_stmt(self, var_decl):
+        var_decl.var_expr = self.expr(var_decl.var_expr)
+
+    def visit_assign_stmt(self, assign_stmt):
+        assign_stmt.rhs = self.expr(assign_stmt.rhs)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.return_expr != None:
+            return_stmt.return_expr = self.expr(return_stmt.return_expr)
+
+    def visit_while_stmt(self, while_stmt):
+        while_stmt.bool_expr = self.bool_expr(while_stmt.bool_expr)
+        while_stmt.stmt_list.accept(self)
+
+    def visit_if_stmt(self, if_stmt):
+        for basic_if in [if_stmt.if_part] + if_stmt.elseifs:
+            basic_if.bool_expr = self.bool_expr(basic_if.bool_expr)
+            basic_if.stmt_list.accept(self)
+        if if_stmt.has_else:
+            if_stmt.else_stmts.accept(self)
+
+    def visit_call_rvalue(self, call_rvalue):
+        call_rvalue.args = [self.expr(arg) for arg in call_rvalue.args]
+
+
+class BranchPruner(Pass):
+    """Drops the if branches whose conditions are literally false and those
+    after one that is literally true, which becomes the else, and while
+    loops whose conditions are literally false. An if left with only its
+    else is replaced by the else's statements, unless they declare
+    variables, which must stay in a block of their own: then the if keeps
+    just the true branch, or just a false one and the else."""
+
+    def visit_stmt_list(self, stmt_list):
+        stmts = []
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+            if isinstance(stmt, ast.IfStmt):
+                stmts.extend(self.__prune_if(stmt))
+            elif not (isinstance(stmt, ast.WhileStmt) and condition_value(stmt.bool_expr) is False):
+                stmts.append(stmt)
+        stmt_list.stmts = stmts
+
+    def __prune_if(self, if_stmt):
+        # the statements if_stmt becomes
+        branches = []
+        else_stmts = if_stmt.else_stmts if if_stmt.has_else else None
+        true_if = None
+        for basic_if in [if_stmt.if_part] + if_stmt.elseifs:
+            value = condition_value(basic_if.bool_expr)
+            if value is None:
+                branches.append(basic_if)
+            elif value:
+                true_if = basic_if
+                else_stmts = basic_if.stmt_list
+                break
+        if branches:
+            if_stmt.if_part = branches[0]
+            if_stmt.elseifs = branches[1:]
+            if_stmt.has_else = else_stmts is not None
+            if else_stmts is not None:
+                if_stmt.else_stmts = else_stmts
+            return [if_stmt]
+        if else_stmts is None:
+            return []
+        if any(isinstance(stmt, ast.VarDeclStmt) for stmt in else_stmts.stmts):
+            if true_if is not None:
+                if_stmt.if_part = true_if
+                if_stmt.has_else = False
+            else:
+                if_stmt.if_part.stmt_list = ast.StmtList()
+            if_stmt.elseifs = []
+            return [if_stmt]
+        return else_stmts.stmts
+
+
+class UnreachableCode(Pass):
+    """Drops the statements of a block after one that cannot complete: a
+    return, a while loop whose condition is literally true (MyPL has no
+    break), or an if with an else where every branch that can run ends
+    in such a statement. Branches whose conditions are literally false
+    are not counted. Statements at the top level of the program are
+    kept, since names declared there are visible from functions declared
+    before them."""
+
+    def run(self):
+        for stmt in self.program.stmts:
+            stmt.accept(self)
+
+    def visit_stmt_list(self, stmt_list):
+        for i, stmt in enumerate(stmt_list.stmts):
+            stmt.accept(self)
+            if not completes(stmt):
+                del stmt_list.stmts[i + 1:]
+                break
+
+
+class DeadStores(Pass):
+    """Drops the declarations of and assignments to variables that are
+    never read, keeping the values assigned as expression statements
+    unless computing them cannot fail or do anything else (literals and
+    plain variables). A name is read wherever it is used other than as
+    the whole target of a set, in any scope, so a variable that may be
+    read by its name somewhere is always kept. Struct fields are kept.
+    Repeats until nothing more is dropped."""
+
+    def run(self):
+        while True:
+            self.read = set()
+            self.program.accept(self)
+            self.changed = False
+            self.__drop(self.program)
+            if not self.changed:
+                break
+
+    def __drop(self, stmt_list):
+        # drops the dead stores of stmt_list and of the blocks it holds
+        stmts = []
+        for stmt in stmt_list.stmts:
+            if isinstance(stmt, ast.VarDeclStmt) and stmt.var_id.lexeme not in self.read:
+                stmt = self.__value(stmt.var_expr)
+            elif (isinstance(stmt, ast.AssignStmt) and len(stmt.lhs.path) == 1
+                    and stmt.lhs.path[0].lexeme not in self.read):
+                stmt = self.__value(stmt.rhs)
+            elif isinstance(stmt, ast.FunDeclStmt):
+                self.__drop(stmt.stmt_list)
+            elif isinstance(stmt, ast.WhileStmt):
+                self.__drop(stmt.stmt_list)
+            elif isinstance(stmt, ast.IfStmt):
+                for basic_if in [stmt.if_part] + stmt.elseifs:
+                    self.__drop(basic_if.stmt_list)
+                self.__drop(stmt.else_stmts)
+            if stmt is not None:
+                stmts.append(stmt)
+        stmt_list.stmts = stmts
+
+    def __value(self, expr):
+        # the statement left of a dead store of expr, or None
+        self.changed = True
+        if isinstance(expr, ast.SimpleExpr) and (resolver.literal(expr) or
+                                                  isinstance(expr.term, ast.IDRvalue) and len(expr.term.path) == 1):
+            return None
+        expr_stmt = ast.ExprStmt()
+        expr_stmt.expr = expr
+        return expr_stmt
+
+    def visit_lvalue(self, lval):
+        if len(lval.path) > 1:
+            self.read.add(lval.path[0].lexeme)
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.val.tokentype == token.ID:
+            self.read.add(simple_rvalue.val.lexeme)
+
+    def visit_new_rvalue(self, new_rvalue):
+        self.read.add(new_rvalue.struct_type.lexeme)
+
+    def visit_call_rvalue(self, call_rvalue):
+        self.read.add(call_rvalue.fun.lexeme)
+        Pass.visit_call_rvalue(self, call_rvalue)
+
+    def visit_id_rvalue(self, id_rvalue):
+        self.read.add(id_rvalue.path[0].lexeme)
+
+
+def constant_key(value):
+    """The key telling apart the values of the constant pool: the value's
+    type and the value, and for a float, its sign, as 0.0 == -0.0 but
+    folding can make either"""
+    if type(value) is float:
+        return (float, value, math.copysign(1.0, value))
+    return (type(value), value)
+
+def condition_value(bool_expr):
+    """True or False if the BoolExpr bool_expr is a literal condition, as
+    ConstantFolder leaves them, otherwise None"""
+    if (bool_expr is None or bool_expr.bool_rel != None or bool_expr.bool_connector != None
+            or not resolver.literal(bool_expr.first_expr)):
+        return None
+    if bool_expr.first_expr.term.val.tokentype != token.BOOLVAL:
+        return None
+    return (bool_expr.first_expr.term.val.lexeme != 'false') != bool_expr.negated
+
+def token_of(node):
+    """The first token of the Expr or RValue node"""
+    if isinstance(node, ast.ComplexExpr):
+        return token_of(node.first_operand)
+    if isinstance(node, ast.SimpleExpr):
+        return token_of(node.term)
+    if isinstance(node, ast.SimpleRValue):
+        return node.val
+    if isinstance(node, ast.NewRValue):
+        return node.struct_type
+    if isinstance(node, ast.CallRValue):
+        return node.fun
+    return node.path[0]
+
+def completes(stmt):
+    """Whether running stmt can go on to the statement after it"""
+    if isinstance(stmt, ast.ReturnStmt):
+        return False
+    if isinstance(stmt, ast.WhileStmt):
+        return condition_value(stmt.bool_expr) is not True
+    if isinstance(stmt, ast.IfStmt):
+        if not stmt.has_else:
+            return True
+        # a branch whose condition is literally false is never run
+        blocks = [x.stmt_list for x in [stmt.if_part] + stmt.elseifs
+                  if condition_value(x.bool_expr) is not False] + [stmt.else_stmts]
+        return any(all(completes(x) for x in block.stmts) for block in blocks)
+    return True
+
+
+# pass name -> Pass class
+PASSES = {
+    'fold': ConstantFolder,
+    'prune': BranchPruner,
+    'unreachable': UnreachableCode,
+    'dead-stores': DeadStores,
+}
+
+# the passes run at each level, in order
+LEVELS = (
+    (),
+    ('fold', 'prune', 'unreachable'),
+    ('fold', 'prune', 'unreachable', 'dead-stores'),
+)
+
+def optimize(stmt_list, level=1, passes=None, eager=False):
+    """Runs the passes named in passes, by default those of level, in order
+    over the checked program stmt_list before it is resolved, and returns
+    it. eager is as for the engines that will run it."""
+    if passes is None:
+        passes = LEVELS[level]
+    for name in passes:
+        PASSES[name](stmt_list, eager).run()
+    return stmt_list
@@ -0,0 +1,146 @@
+import mypl_token as token
+import mypl_error as error
+import mypl_lexer as lexer
+import concurrent.futures
+import io
+import mmap
+import os
+
+class ParallelLexer(object):
+    """Lexes a source in line-aligned chunks on a pool of processes and
+    hands out the stitched token stream through next_token, like Lexer.
+
+    MyPL strings can't hold newlines and comments end at one, so after a
+    newline that directly follows a token (on a line without comments or
+    quotes) the lexer is always at column 1 with no token in progress. The
+    source is only cut at such newlines, each chunk is lexed from line 1,
+    and the line numbers are shifted by the lines counted in the chunks
+    before it, which gives exactly the tokens a single Lexer produces. """
+
+    def __init__(self, text, jobs=None, filename=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        points = split_points(text, self.jobs * 4)
+        if filename is None:
+            work = [text[start:end] for start, end in zip(points, points[1:])]
+            worker = _lex_text if isinstance(text, str) else _lex_bytes
+        else:
+            work = [(filename, start, end) for start, end in zip(points, points[1:])]
+            worker = _lex_file
+        if self.jobs == 1 or len(work) == 1:
+            self.chunks = [worker(w) for w in work]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(self.jobs) as executor:
+                self.chunks = list(executor.map(worker, work))
+        self.chunk_index = 0
+        self.index = 0
+        self.line_offset = 0
+        self.eos = None
+
+    def next_token(self):
+        while self.chunk_index < len(self.chunks):
+            buffer, lines_used, err = self.chunks[self.chunk_index]
+            count = len(buffer)
+            # every chunk ends in EOS, only the one from the last chunk is kept
+            if err is None and self.chunk_index < len(self.chunks) - 1:
+                count -= 1
+            if self.index < count:
+                i = self.index
+                self.index += 1
+                the_token = buffer.token(i, self.line_offset)
+                if the_token.tokentype == token.EOS:
+                    self.eos = the_token
+                return the_token
+            if err is not None:
+                message, line, column = err
+                raise error.MyPLError(message, line + self.line_offset, column)
+            self.line_offset += lines_used - 1
+            self.chunk_index += 1
+            self.index = 0
+        return self.eos
+
+
+def open_parallel(filename, jobs=None):
+    """Returns a ParallelLexer for filename whose workers each map the file
+    and lex their own byte range, so the source is never copied between
+    processes."""
+    with open(filename, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            return ParallelLexer('', jobs)
+    try:
+        return ParallelLexer(buffer, jobs, filename)
+    finally:
+        buffer.close()
+
+
+def split_points(text, parts):
+    """Returns the offsets [0, ..., len(text)] that cut text (a str or a
+    bytes-like object with find/rfind) into at most parts pieces of about
+    equal size, each cut right after a newline that ends a token."""
+    if isinstance(text, str):
+        newline, first, last = '\n', '!', '~'
+        quotes, specials = ['"', "'"], ['#', '"', "'"]
+    else:
+        newline, first, last = b'\n', b'!', b'~'
+        quotes, specials = [b'"', b"'"], [b'#', b'"', b"'"]
+    size = len(text)
+    points = [0]
+    for i in range(1, parts):
+        pos = max(size * i // parts, points[-1])
+        cut = None
+        while cut is None:
+            end = text.find(newline, pos)
+            if end == -1 or end + 1 >= size:
+                break
+            start = text.rfind(newline, 0, end) + 1
+            line = text[start:end]
+            # the line must end in a token (not whitespace), must not hold
+            # a comment or a string, and must not continue a string opened
+            # right before the previous newline
+            if (first <= text[end - 1:end] <= last
+                    and not any(c in line for c in specials)
+                    and (start < 2 or text[start - 2:start - 1] not in quotes)):
+                cut = end + 1
+            pos = end + 1
+        if cut is None:
+            break
+        points.append(cut)
+    points.append(size)
+    return points
+
+
+def _lex(the_lexer):
+    """Lexes to the end of file and returns a TokenBuffer of the tokens,
+    the number of lines counted and any error raised."""
+    buffer = token.TokenBuffer()
+    err = None
+    try:
+        while True:
+            the_token = the_lexer.next_token()
+            buffer.append(the_token)
+            if the_token.tokentype == token.EOS:
+                break
+    except error.MyPLError as e:
+        err = (e.message, e.line, e.column)
+    return buffer, the_lexer.line, err
+
+def _lex_text(text):
+    return _lex(lexer.BufferedLexer(io.StringIO(text)))
+
+def _lex_bytes(text):
+    return _lex(lexer.MappedLexer(text))
+
+def _lex_file(work):
+    filename, start, end = work
+    with open(filename, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with memoryview(buffer) as view:
+        the_lexer = lexer.MappedLexer(view[start:end])
+        try:
+            result = _lex(the_lexer)
+        finally:
+            the_lexer.close()
+    buffer.close()
+    return result
@@ -0,0 +1,170 @@
+import mypl_error as error
+import mypl_lexer as lexer
+import mypl_parser as parser
+import mypl_type_checker as type_checker
+import mypl_resolver as resolver
+import mypl_optimizer as optimizer
+import mypl_interpreter as interpreter
+import mypl_closures as closures
+import mypl_vm as vm
+import mypl_transpiler as transpiler
+import mypl_jit as jit
+import argparse
+import contextlib
+import io
+import sys
+
+def hot_jit(eager=False):
+    """A JitInterpreter compiling every loop and function the first time
+    it is entered, so compiled code runs as much of the program as it can"""
+    return jit.JitInterpreter(eager, loop_threshold=1, call_threshold=1)
+
+# engines checked against the tree walking Interpreter
+ENGINES = [
+    ('closure', closures.ClosureInterpreter),
+    ('vm', vm.VM),
+    ('python', transpiler.TranspilingInterpreter),
+    ('jit', jit.JitInterpreter),
+    ('hot jit', hot_jit),
+]
+
+# programs checked when no files are given, each a case engines (or the
+# optimizer) got wrong
+PROGRAMS = [
+    ('literal in a called function', '''
+fun int f(n: int)
+  var z = 5;
+  if n > 100 then
+    return z;
+  end
+  return nil;
+end
+print(itos(f(1)));
+'''),
+    ('literal field of a struct made in a called function', '''
+struct S
+  var a = 7;
+end
+fun int g()
+  var s = new S;
+  return nil;
+end
+print(itos(g()));
+'''),
+    ('variable argument to a called function', '''
+fun int g(x: int)
+  var y = x;
+  return nil;
+end
+var i = 3;
+print(itos(g(i)));
+'''),
+    ('literal in the arguments of a called function', '''
+fun int g(x: int, y: int)
+  var z = 5;
+  return nil;
+end
+var i = 3;
+print(itos(g(i, 0)));
+'''),
+    ('no literal in the arguments', '''
+var i = 3;
+var x: int = nil;
+print(itos(x));
+'''),
+    ('variable a function called in a hot loop sets to nil', '''
+var x = 1;
+fun nil f()
+  set x = nil;
+end
+var i = 0;
+while i < 100 do
+  set x = 2;
+  if i > 60 then
+    f();
+  end
+  print(itos(x));
+  set i = i + 1;
+end
+'''),
+    ('function running off its end', '''
+fun int f(n: int)
+  var x = n + 1;
+end
+var i = 0;
+while i < 3 do
+  print(itos(f(i)));
+  set i = i + 1;
+end
+'''),
+    ('empty program', ''),
+    ('negative zero folded with a zero in the pool (run with -O1)', '''
+var z = 0.0;
+print(ftos(0.0 * 1.0 - 2.0));
+'''),
+]
+
+def outcome(make_interpreter, source, input_text='', eager=False, level=0):
+    """Runs the program source and returns what came of it: ('ok', output),
+    ('error', message, output) for a MyPLError, or ('crash', output) for
+    any other exception. The kind of a crash is not kept, since engines
+    fail differently on a nil struct. The interpreter is made with
+    make_interpreter(eager), and the program optimized at level."""
+    output = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(input_text)
+    try:
+        with contextlib.redirect_stdout(output):
+            stmt_list = parser.Parser(lexer.BufferedLexer(io.StringIO(source))).parse()
+            stmt_list.accept(type_checker.TypeChecker())
+            optimizer.optimize(stmt_list, level, eager=eager)
+            make_interpreter(eager).run(resolver.resolve(stmt_list))
+        return ('ok', output.getvalue())
+    except error.MyPLError as e:
+        return ('error', str(e), output.getvalue())
+    except Exception:
+        return ('crash', output.getvalue())
+    finally:
+        sys.stdin = stdin
+
+def compare(source, input_text='', engines=ENGINES, eager=False, level=0):
+    """Returns [(engine name, outcome, Interpreter's outcome)] for each
+    engine whose outcome differs from Interpreter's. The engines run the
+    program optimized at level, Interpreter as written, so a level above 0
+    checks Interpreter running the optimized program too."""
+    expected = outcome(interpreter.Interpreter, source, input_text, eager)
+    if level:
+        engines = [('tree', interpreter.Interpreter)] + list(engines)
+    differences = []
+    for name, make_interpreter in engines:
+        result = outcome(make_interpreter, source, input_text, eager, level)
+        if result != expected:
+            differences.append((name, result, expected))
+    return differences
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Checks that every engine runs MyPL programs as Interpreter does')
+    arg_parser.add_argument('files', nargs='*', help='programs to check (by default, PROGRAMS)')
+    arg_parser.add_argument('--input', help='a file to feed the programs as standard input')
+    arg_parser.add_argument('--eager', action='store_true', help='run with and/or evaluating both sides')
+    arg_parser.add_argument('-O', dest='level', type=int, choices=range(len(optimizer.LEVELS)), default=0,
+                            help='run the engines on the program optimized at this level')
+    args = arg_parser.parse_args()
+    input_text = ''
+    if args.input:
+        with open(args.input) as f:
+            input_text = f.read()
+    programs = PROGRAMS
+    if args.files:
+        programs = []
+        for filename in args.files:
+            with open(filename) as f:
+                programs.append((filename, f.read()))
+    failed = 0
+    for name, source in programs:
+        differences = compare(source, input_text, eager=args.eager, level=args.level)
+        for engine, result, expected in differences:
+            print('%s: %s gave %r, expected %r' % (name, engine, result, expected))
+        failed += bool(differences)
+    print('%i of %i programs differ' % (failed, len(programs)))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,428 @@
+import mypl_token as token
+import mypl_ast as ast
+import mypl_builtins as builtins
+
+class Resolver(ast.Visitor):
+    """Gives every variable, function and struct a slot in a list-backed
+    frame, run after type checking. The program and each function call
+    get a frame (frame[0] links to the frame the function was declared
+    in), and the blocks inside a function share its frame, each declared
+    name getting its own slot. A name is then addressed as (depth, slot):
+    depth frames up the links, then index slot. A struct's field
+    initializers get a frame of their own, linked like a function's.
+
+    Sibling blocks reuse the same slots, and a block that declares
+    anything records its slots as frame[scope_start:scope_end] so they can
+    be cleared when it is left. Blocks that declare nothing need no
+    scope at all.
+
+    Names are resolved as the interpreter used to look them up: a name
+    declared at the top level of the program is visible everywhere (its
+    slot is None until the declaration runs), and a name that resolves to
+    nothing is left with a None slot, which reads as nil.
+
+    A return statement in a function returning a call to a MyPL function
+    is marked as a tail call: nothing is left to do in the caller's frame
+    once the arguments are evaluated, so engines can run the callee in
+    place of the caller instead of nesting the call."""
+
+    def __init__(self):
+        # stack of {name: (frame level, slot)}, innermost last
+        self.scopes = []
+        # [next free slot, size] of each frame being resolved, innermost last
+        self.frames = []
+        # the FunDeclStmt being resolved, if any
+        self.function = None
+
+    def resolve(self, stmt_list):
+        """Resolves the program stmt_list, setting its frame_size"""
+        self.frames.append([1, 1])
+        self.scopes.append({})
+        # top level names are visible before their declarations run
+        for stmt in stmt_list.stmts:
+            name = declared_name(stmt)
+            if name is not None:
+                self.__declare(name)
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+        self.scopes.pop()
+        stmt_list.frame_size = self.frames.pop()[1]
+
+    def __declare(self, name):
+        """Returns the slot for a declaration of name in the current scope,
+        the one it already has if it was declared there before"""
+        scope = self.scopes[-1]
+        if name in scope:
+            return scope[name][1]
+        frame = self.frames[-1]
+        slot = frame[0]
+        frame[0] += 1
+        frame[1] = max(frame[1], frame[0])
+        scope[name] = (len(self.frames) - 1, slot)
+        return slot
+
+    def __lookup(self, name):
+        """Returns the (depth, slot) of name, or (None, None)"""
+        for scope in reversed(self.scopes):
+            if name in scope:
+                level, slot = scope[name]
+                return len(self.frames) - 1 - level, slot
+        return None, None
+
+    def __block(self, stmt_list):
+        frame = self.frames[-1]
+        start = frame[0]
+        self.scopes.append({})
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+        self.scopes.pop()
+        if frame[0] > start:
+            stmt_list.scope_start = start
+            stmt_list.scope_end = frame[0]
+        # the next block can reuse this one's slots
+        frame[0] = start
+
+    def visit_stmt_list(self, stmt_list):
+        self.__block(stmt_list)
+
+    def visit_expr_stmt(self, expr_stmt):
+        expr_stmt.expr.accept(self)
+
+    def visit_var_decl_stmt(self, var_decl):
+        var_decl.var_expr.accept(self)
+        var_decl.slot = self.__declare(var_decl.var_id.lexeme)
+
+    def visit_assign_stmt(self, assign_stmt):
+        assign_stmt.rhs.accept(self)
+        assign_stmt.lhs.accept(self)
+
+    def visit_struct_decl_stmt(self, struct_decl):
+        struct_decl.slot = self.__declare(struct_decl.struct_id.lexeme)
+        self.frames.append([1, 1])
+        self.scopes.append({})
+        for var_decl in struct_decl.var_decls:
+            var_decl.accept(self)
+        self.scopes.pop()
+        struct_decl.frame_size = self.frames.pop()[1]
+
+    def visit_fun_decl_stmt(self, fun_decl):
+        fun_decl.slot = self.__declare(fun_decl.fun_name.lexeme)
+        self.frames.append([1, 1])
+        self.scopes.append({})
+        for param in fun_decl.params:
+            param.accept(self)
+        self.function = fun_decl
+        self.__block(fun_decl.stmt_list)
+        self.function = None
+        self.scopes.pop()
+        fun_decl.frame_size = self.frames.pop()[1]
+
+    def visit_fun_param(self, fun_param):
+        fun_param.slot = self.__declare(fun_param.param_name.lexeme)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.return_expr != None:
+            return_stmt.return_expr.accept(self)
+            expr = return_stmt.return_expr
+            return_stmt.tail_call = (self.function is not None and isinstance(expr, ast.SimpleExpr) and
+                                     isinstance(expr.term, ast.CallRValue) and expr.term.slot is not None and
+                                     expr.term.fun.lexeme not in builtins.BUILT_INS)
+
+    def visit_while_stmt(self, while_stmt):
+        while_stmt.bool_expr.accept(self)
+        self.__block(while_stmt.stmt_list)
+
+    def visit_if_stmt(self, if_stmt):
+        for basic_if in [if_stmt.if_part] + if_stmt.elseifs:
+            basic_if.bool_expr.accept(self)
+            self.__block(basic_if.stmt_list)
+        if if_stmt.has_else:
+            self.__block(if_stmt.else_stmts)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        while isinstance(complex_expr, ast.ComplexExpr):
+            complex_expr.first_operand.accept(self)
+            complex_expr = complex_expr.rest
+        complex_expr.accept(self)
+
+    def visit_bool_expr(self, bool_expr):
+        # long and/or chains are walked in a loop rather than recursively
+        while bool_expr is not None:
+            bool_expr.first_expr.accept(self)
+            if bool_expr.bool_rel != None:
+                bool_expr.second_expr.accept(self)
+            if bool_expr.bool_connector == None:
+                break
+            bool_expr = bool_expr.rest
+
+    def visit_lvalue(self, lval):
+        lval.depth, lval.slot = self.__lookup(lval.path[0].lexeme)
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.val.tokentype == token.ID:
+            simple_rvalue.depth, simple_rvalue.slot = self.__lookup(simple_rvalue.val.lexeme)
+
+    def visit_new_rvalue(self, new_rvalue):
+        new_rvalue.depth, new_rvalue.slot = self.__lookup(new_rvalue.struct_type.lexeme)
+
+    def visit_call_rvalue(self, call_rvalue):
+        call_rvalue.depth, call_rvalue.slot = self.__lookup(call_rvalue.fun.lexeme)
+        for arg in call_rvalue.args:
+            arg.accept(self)
+
+    def visit_id_rvalue(self, id_rvalue):
+        id_rvalue.depth, id_rvalue.slot = self.__lookup(id_rvalue.path[0].lexeme)
+
+
+class ScalarReplacer(ast.Visitor):
+    """Replaces the structs functions make with new that never escape the
+    function by a variable per field, run before resolving. A struct held
+    in a variable escapes when the variable is used other than through a
+    field: returned, passed to a function, stored, compared or assigned.
+    Declaring the variable again in the same scope (sharing its slot)
+    also counts as escaping. Only structs declared before the function,
+    whose initializers are all literals, are replaced.
+
+    var p = new S; then declares a variable "p.f" (a name no program can
+    use) per field f of S, set to its literal, and p.f in a path reads or
+    writes that variable."""
+
+    def __init__(self):
+        # top level struct name -> StructDeclStmt, of the structs that can
+        # be replaced declared so far
+        self.structs = {}
+        # stack of {name: VarDeclStmt of a struct that may be replaced, or
+        # None}, innermost last, for the function being walked
+        self.scopes = []
+        # the StmtList being walked
+        self.stmt_list = None
+        # VarDeclStmt -> (StmtList holding it, StructDeclStmt, [IDRvalues
+        # and LValues of paths through it])
+        self.candidates = {}
+        # VarDeclStmts whose structs escape
+        self.escaped = set()
+
+    def replace(self, stmt_list):
+        """Replaces the structs of the program stmt_list that do not escape,
+        returning how many news were replaced"""
+        counts = {}
+        for stmt in stmt_list.stmts:
+            name = declared_name(stmt)
+            if name is not None:
+                counts[name] = counts.get(name, 0) + 1
+        for stmt in stmt_list.stmts:
+            if isinstance(stmt, ast.StructDeclStmt):
+                name = stmt.struct_id.lexeme
+                if counts[name] == 1 and all(literal(x.var_expr) for x in stmt.var_decls):
+                    self.structs[name] = stmt
+            elif isinstance(stmt, ast.FunDeclStmt):
+                stmt.accept(self)
+        replaced = 0
+        for var_decl, (block, struct_decl, paths) in self.candidates.items():
+            if var_decl not in self.escaped:
+                self.__replace(var_decl, block, struct_decl, paths)
+                replaced += 1
+        return replaced
+
+    def __replace(self, var_decl, block, struct_decl, paths):
+        name = var_decl.var_id
+        decls = []
+        for field in struct_decl.var_decls:
+            decl = ast.VarDeclStmt()
+            decl.var_id = field_token(name, field.var_id)
+            decl.var_type = field.var_type
+            decl.var_expr = ast.SimpleExpr()
+            decl.var_expr.inferred_type = field.var_expr.inferred_type
+            decl.var_expr.term = ast.SimpleRValue()
+            decl.var_expr.term.val = field.var_expr.term.val
+            decl.var_expr.term.const = field.var_expr.term.const
+            decl.var_expr.term.inferred_type = field.var_expr.term.inferred_type
+            decls.append(decl)
+        i = block.stmts.index(var_decl)
+        block.stmts[i:i + 1] = decls
+        for path in paths:
+            path.path = [field_token(path.path[0], path.path[1])] + path.path[2:]
+            path.fields = path.fields[1:] if len(path.path) > 1 else None
+
+    def __lookup(self, name):
+        """Returns the scope declaring name in the function, or None"""
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope
+        return None
+
+    def __use(self, name, length, node):
+        # a use of name through a path of length names
+        scope = self.__lookup(name)
+        if scope is not None and scope[name] is not None:
+            if length > 1:
+                self.candidates[scope[name]][2].append(node)
+            else:
+                self.escaped.add(scope[name])
+
+    def visit_fun_decl_stmt(self, fun_decl):
+        self.scopes.append({x.param_name.lexeme: None for x in fun_decl.params})
+        fun_decl.stmt_list.accept(self)
+        self.scopes.pop()
+
+    def visit_stmt_list(self, stmt_list):
+        outer = self.stmt_list
+        self.stmt_list = stmt_list
+        self.scopes.append({})
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+        self.scopes.pop()
+        self.stmt_list = outer
+
+    def visit_expr_stmt(self, expr_stmt):
+        expr_stmt.expr.accept(self)
+
+    def visit_var_decl_stmt(self, var_decl):
+        var_decl.var_expr.accept(self)
+        name = var_decl.var_id.lexeme
+        scope = self.scopes[-1]
+        expr = var_decl.var_expr
+        struct_decl = None
+        if isinstance(expr, ast.SimpleExpr) and isinstance(expr.term, ast.NewRValue):
+            struct_name = expr.term.struct_type.lexeme
+            if self.__lookup(struct_name) is None:
+                struct_decl = self.structs.get(struct_name)
+        if name in scope:
+            self.escaped.add(scope[name])
+            struct_decl = None
+        scope[name] = None
+        if struct_decl is not None:
+            scope[name] = var_decl
+            self.candidates[var_decl] = (self.stmt_list, struct_decl, [])
+
+    def visit_assign_stmt(self, assign_stmt):
+        assign_stmt.rhs.accept(self)
+        assign_stmt.lhs.accept(self)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.return_expr != None:
+            return_stmt.return_expr.accept(self)
+
+    def visit_while_stmt(self, while_stmt):
+        while_stmt.bool_expr.accept(self)
+        while_stmt.stmt_list.accept(self)
+
+    def visit_if_stmt(self, if_stmt):
+        for basic_if in [if_stmt.if_part] + if_stmt.elseifs:
+            basic_if.bool_expr.accept(self)
+            basic_if.stmt_list.accept(self)
+        if if_stmt.has_else:
+            if_stmt.else_stmts.accept(self)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        while isinstance(complex_expr, ast.ComplexExpr):
+            complex_expr.first_operand.accept(self)
+            complex_expr = complex_expr.rest
+        complex_expr.accept(self)
+
+    def visit_bool_expr(self, bool_expr):
+        while bool_expr is not None:
+            bool_expr.first_expr.accept(self)
+            if bool_expr.bool_rel != None:
+                bool_expr.second_expr.accept(self)
+            if bool_expr.bool_connector == None:
+                break
+            bool_expr = bool_expr.rest
+
+    def visit_lvalue(self, lval):
+        self.__use(lval.path[0].lexeme, len(lval.path), lval)
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.val.tokentype == token.ID:
+            self.__use(simple_rvalue.val.lexeme, 1, simple_rvalue)
+
+    def visit_call_rvalue(self, call_rvalue):
+        for arg in call_rvalue.args:
+            arg.accept(self)
+
+    def visit_id_rvalue(self, id_rvalue):
+        self.__use(id_rvalue.path[0].lexeme, len(id_rvalue.path), id_rvalue)
+
+
+def declared_name(stmt):
+    """The name a top level statement declares, or None"""
+    if isinstance(stmt, ast.VarDeclStmt):
+        return stmt.var_id.lexeme
+    if isinstance(stmt, ast.StructDeclStmt):
+        return stmt.struct_id.lexeme
+    if isinstance(stmt, ast.FunDeclStmt):
+        return stmt.fun_name.lexeme
+    return None
+
+def field_token(name, field):
+    """The ID token of the variable ScalarReplacer replaces field of the
+    struct in the variable name by"""
+    return token.Token(token.ID, name.lexeme + '.' + field.lexeme, name.line, name.column)
+
+def field_names(struct_decl):
+    """The field names of a StructDeclStmt in the order struct values keep
+    their fields in: the order the fields are first declared in, as the
+    type checker numbers them"""
+    return list(dict.fromkeys(x.var_id.lexeme for x in struct_decl.var_decls))
+
+def literal(expr):
+    """Whether the Expr expr is a literal, such as 0, "" or nil"""
+    return (isinstance(expr, ast.SimpleExpr) and isinstance(expr.term, ast.SimpleRValue)
+            and expr.term.const is not None)
+
+def error_token(call_rvalue):
+    """The token every engine reports errors in the located built-in of
+    call_rvalue (a CallRValue) at: the last simple rvalue in its
+    arguments, in the order they are evaluated, or the call's name if they
+    have none. It is found statically, so it does not depend on what the
+    functions called in the arguments evaluate, nor on the optimizer."""
+    last = call_rvalue.fun
+    pending = list(reversed(call_rvalue.args))
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.SimpleExpr):
+            pending.append(node.term)
+        elif isinstance(node, ast.ComplexExpr):
+            pending.append(node.rest)
+            pending.append(node.first_operand)
+        elif isinstance(node, ast.SimpleRValue):
+            last = node.val
+        elif isinstance(node, ast.CallRValue):
+            pending.extend(reversed(node.args))
+    return last
+
+def struct_template(struct_decl, constants):
+    """Splits the field initializers of a resolved StructDeclStmt, so only
+    those that are not literals run when a struct is made. Returns the
+    field values the literals give, in field order (None for the other
+    fields), the frame they give the other initializers (frame[0], the
+    link, left None), and the (field index, VarDeclStmt) of the other
+    initializers, to run in order in a copy of that frame. constants is
+    the program's constant pool."""
+    names = field_names(struct_decl)
+    values = [None] * len(names)
+    frame = [None] * struct_decl.frame_size
+    initializers = []
+    for var_decl in struct_decl.var_decls:
+        i = names.index(var_decl.var_id.lexeme)
+        expr = var_decl.var_expr
+        if literal(expr):
+            values[i] = frame[var_decl.slot] = constants[expr.term.const]
+        else:
+            initializers.append((i, var_decl))
+    return values, frame, initializers
+
+def resolve(stmt_list):
+    """Resolves the program stmt_list (a type checked StmtList) unless that
+    was done already, first replacing the structs that do not escape (see
+    ScalarReplacer), and returns it"""
+    if stmt_list.frame_size is None:
+        stmt_list.scalar_replaced_sites = ScalarReplacer().replace(stmt_list)
+        Resolver().resolve(stmt_list)
+    return stmt_list
@@ -0,0 +1,123 @@
+import mypl_error as error
+import gc
+import sys
+import time
+
+# The built-in functions registered in mypl_builtins, which every engine and
+# the Python modules generated by mypl_transpiler call. Functions that can
+# fail are passed the line and column to report the error at.
+
+class Struct(list):
+    """A struct value of the engines other than mypl_transpiler's: the
+    values of its fields, in the order resolver.field_names gives, read
+    and written by the field indices the type checker gives paths. A
+    struct is only equal to itself."""
+    __slots__ = ()
+    __eq__ = object.__eq__
+    __ne__ = object.__ne__
+    __hash__ = object.__hash__
+
+class HeapStats(object):
+    """Counts the structs an engine allocates, and the collections of
+    CPython's cyclic garbage collector made while it runs (as a context
+    manager). Structs are ordinary Python objects: most are freed by
+    reference counting once the last reference to them is gone, and the
+    collector frees cycles of them. Live structs are counted on demand,
+    over every Struct in the process."""
+
+    def __init__(self):
+        # structs allocated, and their size in bytes
+        self.allocated = 0
+        self.allocated_bytes = 0
+        # new expressions in the program the resolver replaced by
+        # variables. A static count: each replaced new allocates nothing
+        # however often it runs, so this is not comparable to allocated
+        self.scalar_replaced_sites = 0
+        # collections, objects they freed and their pause times in seconds
+        self.collections = 0
+        self.collected = 0
+        self.pause = 0.0
+        self.max_pause = 0.0
+        self.__started = None
+
+    def allocate(self, struct_obj):
+        """Counts and returns the new struct struct_obj"""
+        self.allocated += 1
+        self.allocated_bytes += sys.getsizeof(struct_obj)
+        return struct_obj
+
+    def __enter__(self):
+        gc.callbacks.append(self.__callback)
+        return self
+
+    def __exit__(self, *exc_info):
+        gc.callbacks.remove(self.__callback)
+
+    def __callback(self, phase, info):
+        if phase == 'start':
+            self.__started = time.perf_counter()
+        elif self.__started is not None:
+            pause = time.perf_counter() - self.__started
+            self.collections += 1
+            self.collected += info['collected']
+            self.pause += pause
+            self.max_pause = max(self.max_pause, pause)
+            self.__started = None
+
+    def stats(self):
+        """Returns the counters as a dict, with the structs still live and
+        those freed since allocation (by reference counting or a
+        collection)"""
+        live = [x for x in gc.get_objects() if type(x) is Struct]
+        live_bytes = sum(sys.getsizeof(x) for x in live)
+        return {'allocated': self.allocated, 'allocated_bytes': self.allocated_bytes,
+                'scalar_replaced_sites': self.scalar_replaced_sites,
+                'live': len(live), 'live_bytes': live_bytes,
+                'freed': max(self.allocated - len(live), 0),
+                'freed_bytes': max(self.allocated_bytes - live_bytes, 0),
+                'collections': self.collections, 'collected': self.collected,
+                'pause': self.pause, 'max_pause': self.max_pause}
+
+    def report(self):
+        """Returns stats() as lines of text"""
+        return '\n'.join('%-21s %s' % (name, '%.6fs' % value if isinstance(value, float) else value)
+                         for name, value in self.stats().items())
+
+def print_(s):
+    print(s, end='')
+    return s
+
+def get(i, s, line, column):
+    if 0 <= i < len(s):
+        return s[i]
+    raise error.MyPLError("get out of bounds", line, column)
+
+def readi(line, column):
+    try:
+        return int(input())
+    except ValueError:
+        raise error.MyPLError('bad int value', line, column)
+
+def reads():
+    return input()
+
+def readf():
+    return float(input())
+
+def itof(i, line, column):
+    if i == 'nil' or i == None:
+        raise error.MyPLError("can't do that with a nil", line, column)
+    return float(i)
+
+def itos(i, line, column):
+    if i == 'nil' or i == None:
+        raise error.MyPLError("can't do that with a nil", line, column)
+    return str(i)
+
+def main(program):
+    """Runs program (a generated module's _program), exiting with the
+    error message if it raises a MyPLError, as main.py does"""
+    try:
+        program()
+    except error.MyPLError as e:
+        sys.exit(e)
@@ -1,54 +1,109 @@
-ASSIGN = 'ASSIGN'
-COMMA = 'COMMA'
-COLON = 'COLON'
-DIVIDE = 'DIVIDE'
-DOT = 'DOT'
-EQUAL = 'EQUAL'
-EOS = 'EOS'
-GREATER_THAN = 'GREATER_THAN'
-GREATER_THAN_EQUAL = 'GREATER_THAN_EQUAL'
-LESS_THAN = 'LESS_THAN'
-LESS_THAN_EQUAL = 'LESS_THAN_EQUAL'
-NOT_EQUAL = 'NOT_EQUAL'
-LPAREN = 'LPAREN'
-RPAREN = 'RPAREN'
-MINUS = 'MINUS'
-MODULO = 'MODULO'
-MULTIPLY = 'MULTIPLY'
-PLUS = 'PLUS'
-SEMICOLON = 'SEMICOLON'
-BOOLTYPE = 'BOOLTYPE'
-INTTYPE = 'INTTYPE'
-FLOATTYPE = 'FLOATTYPE'
-STRINGTYPE = 'STRINGTYPE'
-STRUCTTYPE = 'STRUCTTYPE'
-AND = 'AND'
-OR = 'OR'
-NOT = 'NOT'
-WHILE = 'WHILE'
-DO = 'DO'
-IF = 'IF'
-THEN = 'THEN'
-ELSE = 'ELSE'
-ELIF = 'ELIF'
-END = 'END'
-FUN = 'FUN'
-VAR = 'VAR'
-SET = 'SET'
-RETURN = 'RETURN'
-NEW = 'NEW'
-NIL = 'NIL'
-BOOLVAL = 'BOOLVAL'
-INTVAL = 'INTVAL'
-FLOATVAL = 'FLOATVAL'
-STRINGVAL = 'STRINGVAL'
-ID = 'ID'
-
-class Token(object):
-    def __init__(self, tokentype, lexeme, line, column):
-        self.tokentype = tokentype
-        self.lexeme = lexeme
-        self.line = line
-        self.column = column
-    def __str__(self):
-        return (self.tokentype + " '" + self.lexeme + "' " + str(self.line) + ":" + str(self.column))
\ No newline at end of file
+import array
+
+ASSIGN = 'ASSIGN'
+COMMA = 'COMMA'
+COLON = 'COLON'
+DIVIDE = 'DIVIDE'
+DOT = 'DOT'
+EQUAL = 'EQUAL'
+EOS = 'EOS'
+GREATER_THAN = 'GREATER_THAN'
+GREATER_THAN_EQUAL = 'GREATER_THAN_EQUAL'
+LESS_THAN = 'LESS_THAN'
+LESS_THAN_EQUAL = 'LESS_THAN_EQUAL'
+NOT_EQUAL = 'NOT_EQUAL'
+LPAREN = 'LPAREN'
+RPAREN = 'RPAREN'
+MINUS = 'MINUS'
+MODULO = 'MODULO'
+MULTIPLY = 'MULTIPLY'
+PLUS = 'PLUS'
+SEMICOLON = 'SEMICOLON'
+BOOLTYPE = 'BOOLTYPE'
+INTTYPE = 'INTTYPE'
+FLOATTYPE = 'FLOATTYPE'
+STRINGTYPE = 'STRINGTYPE'
+STRUCTTYPE = 'STRUCTTYPE'
+AND = 'AND'
+OR = 'OR'
+NOT = 'NOT'
+WHILE = 'WHILE'
+DO = 'DO'
+IF = 'IF'
+THEN = 'THEN'
+ELSE = 'ELSE'
+ELIF = 'ELIF'
+END = 'END'
+FUN = 'FUN'
+VAR = 'VAR'
+SET = 'SET'
+RETURN = 'RETURN'
+NEW = 'NEW'
+NIL = 'NIL'
+BOOLVAL = 'BOOLVAL'
+INTVAL = 'INTVAL'
+FLOATVAL = 'FLOATVAL'
+STRINGVAL = 'STRINGVAL'
+ID = 'ID'
+
+# every token type, in a fixed order giving each a small integer code
+KINDS = (ASSIGN, COMMA, COLON, DIVIDE, DOT, EQUAL, EOS, GREATER_THAN,
+         GREATER_THAN_EQUAL, LESS_THAN, LESS_THAN_EQUAL, NOT_EQUAL, LPAREN,
+         RPAREN, MINUS, MODULO, MULTIPLY, PLUS, SEMICOLON, BOOLTYPE, INTTYPE,
+         FLOATTYPE, STRINGTYPE, STRUCTTYPE, AND, OR, NOT, WHILE, DO, IF, THEN,
+         ELSE, ELIF, END, FUN, VAR, SET, RETURN, NEW, NIL, BOOLVAL, INTVAL,
+         FLOATVAL, STRINGVAL, ID)
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+class Token(object):
+    __slots__ = ('tokentype', 'lexeme', 'line', 'column')
+
+    def __init__(self, tokentype, lexeme, line, column):
+        self.tokentype = tokentype
+        self.lexeme = lexeme
+        self.line = line
+        self.column = column
+    def __str__(self):
+        return (self.tokentype + " '" + self.lexeme + "' " + str(self.line) + ":" + str(self.column))
+
+class TokenBuffer(object):
+    """Struct-of-arrays storage for the tokens of a whole file. Token kind
+    codes, lexeme numbers, lines and columns each live in an array, and
+    each distinct lexeme is stored once, so a buffered token costs about a
+    dozen bytes instead of a Token object. """
+
+    def __init__(self):
+        self.kinds = array.array('B')
+        self.lexeme_ids = array.array('I')
+        self.lines = array.array('I')
+        self.columns = array.array('I')
+        self.lexemes = [] # distinct lexemes
+        self.lexeme_index = {} # lexeme -> position in lexemes
+
+    def append(self, the_token):
+        lexeme_id = self.lexeme_index.get(the_token.lexeme)
+        if lexeme_id is None:
+            lexeme_id = len(self.lexemes)
+            self.lexemes.append(the_token.lexeme)
+            self.lexeme_index[the_token.lexeme] = lexeme_id
+        self.kinds.append(KIND_CODES[the_token.tokentype])
+        self.lexeme_ids.append(lexeme_id)
+        self.lines.append(the_token.line)
+        self.columns.append(the_token.column)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def token(self, i, line_offset=0):
+        return Token(KINDS[self.kinds[i]], self.lexemes[self.lexeme_ids[i]],
+                     self.lines[i] + line_offset, self.columns[i])
+
+    def __getstate__(self):
+        # the index is rebuilt on arrival, no need to ship it between processes
+        state = dict(self.__dict__)
+        state['lexeme_index'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lexeme_index = {lexeme: i for i, lexeme in enumerate(self.lexemes)}
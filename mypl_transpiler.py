@@ -0,0 +1,351 @@
+import mypl_ast as ast
+import mypl_resolver as resolver
+import mypl_operators as operators
+import mypl_builtins
+import mypl_runtime as runtime
+import builtins
+import keyword
+import re
+
+HEADER = '''# generated from MyPL by mypl_transpiler
+from mypl_builtins import BUILT_INS as _built_ins
+from mypl_runtime import main as _main
+'''
+FOOTER = '''
+if __name__ == '__main__':
+    _main(_program)
+'''
+# names the generated code needs for itself
+RESERVED = (set(keyword.kwlist) | set(dir(builtins)) |
+            {'self', '_built_ins', '_main', '_program'})
+
+def built_in_name(name):
+    """The Python name generated code calls the built-in function name by"""
+    return '_' + name
+
+class Transpiler(ast.Visitor):
+    """Translates a checked, resolved program into the source of a Python
+    module. The program becomes the function _program, its variables
+    locals of _program, and its functions and structs (classes with
+    __slots__) are nested in _program so they can reach those variables
+    as closures. Each MyPL variable (a frame and slot) gets a Python name
+    of its own, so Python scoping never hides one behind another.
+
+    and/or become Python's and/or, or if eager, & and | on the (bool)
+    results so both sides are evaluated. A function's tail calls to itself
+    (see mypl_resolver) rebind its parameters and continue a loop around
+    its body, breaking out of the while loops they are in first, so they
+    take no Python stack; other calls are Python calls. Struct values are
+    the objects themselves, so using a nil struct raises AttributeError
+    where Interpreter raises TypeError."""
+
+    def __init__(self, eager=False):
+        self.eager = eager
+        self.lines = []
+        self.indent = 1
+        # Python source of the last expression visited
+        self.source = None
+        # nodes (StmtList, FunDeclStmt or StructDeclStmt) owning the frames
+        # being translated, innermost last
+        self.frames = []
+        # (frame node, slot, name) -> Python name
+        self.names = {}
+        self.used = set(RESERVED) | set(built_in_name(x) for x in mypl_builtins.BUILT_INS)
+        # built-in functions called
+        self.built_ins = set()
+        # field name -> attribute name
+        self.fields = {}
+        # program variables assigned by the function being translated
+        self.outer_stores = set()
+        # the FunDeclStmt being translated, the while loops it is in,
+        # whether it made a tail call to itself, and the name of the flag
+        # set to break out of while loops for one, with the breaks made
+        self.function = None
+        self.loops = 0
+        self.self_tail_calls = False
+        self.again = None
+        self.breaks = 0
+        # the program's constant pool
+        self.literals = None
+
+    def transpile(self, stmt_list):
+        """Returns the Python module for the program stmt_list"""
+        self.literals = stmt_list.constants
+        self.frames.append(stmt_list)
+        stmt_list.accept(self)
+        self.frames.pop()
+        body = self.lines
+        self.lines = []
+        # program variables can be read before their declarations run
+        program_names = [name for (frame, slot, lexeme), name in self.names.items() if frame is stmt_list]
+        if program_names:
+            self.emit(' = '.join(program_names) + ' = None')
+        if not self.lines and not body:
+            self.emit('pass')
+        imports = ''.join('%s = _built_ins[%r].function\n' % (built_in_name(x), x) for x in sorted(self.built_ins))
+        return (HEADER + imports + '\ndef _program():\n' + '\n'.join(self.lines + body) + '\n' +
+                FOOTER)
+
+    def emit(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def __unique(self, name):
+        # MyPL names may hold characters Python names cannot
+        name = re.sub(r'\W', '_', name)
+        if name[0].isdigit():
+            name = '_' + name
+        # a leading __ would be mangled inside a class
+        name = re.sub(r'^__+', '_', name)
+        candidate = name
+        count = 1
+        while candidate in self.used:
+            count += 1
+            candidate = '%s_%i' % (name, count)
+        self.used.add(candidate)
+        return candidate
+
+    def __name(self, depth, slot, lexeme):
+        """Returns the Python name of the variable at (depth, slot)"""
+        key = (self.frames[-1 - depth], slot, lexeme)
+        if key not in self.names:
+            self.names[key] = self.__unique(lexeme)
+        return self.names[key]
+
+    def __field(self, lexeme):
+        if lexeme not in self.fields:
+            self.fields[lexeme] = self.__unique(lexeme + '_')
+        return self.fields[lexeme]
+
+    def __expr(self, node):
+        node.accept(self)
+        return self.source
+
+    def __block(self, stmt_list):
+        self.indent += 1
+        if not stmt_list.stmts:
+            self.emit('pass')
+        stmt_list.accept(self)
+        self.indent -= 1
+
+    def visit_stmt_list(self, stmt_list):
+        for stmt in stmt_list.stmts:
+            stmt.accept(self)
+
+    def visit_expr_stmt(self, expr_stmt):
+        self.emit(self.__expr(expr_stmt.expr))
+
+    def visit_var_decl_stmt(self, var_decl):
+        value = self.__expr(var_decl.var_expr)
+        self.emit('%s = %s' % (self.__name(0, var_decl.slot, var_decl.var_id.lexeme), value))
+
+    def visit_assign_stmt(self, assign_stmt):
+        value = self.__expr(assign_stmt.rhs)
+        lval = assign_stmt.lhs
+        if lval.slot is None:
+            # an unknown variable: the value is computed and dropped
+            self.emit(value)
+            return
+        target = self.__name(lval.depth, lval.slot, lval.path[0].lexeme)
+        if len(lval.path) == 1 and lval.depth > 0:
+            self.outer_stores.add(target)
+        target += ''.join('.' + self.__field(x.lexeme) for x in lval.path[1:])
+        self.emit('%s = %s' % (target, value))
+
+    def visit_struct_decl_stmt(self, struct_decl):
+        name = self.__name(0, struct_decl.slot, struct_decl.struct_id.lexeme)
+        fields = [self.__field(x.var_id.lexeme) for x in struct_decl.var_decls]
+        self.emit('class %s(object):' % name)
+        self.indent += 1
+        self.emit('__slots__ = (%s)' % ''.join(repr(x) + ', ' for x in fields))
+        self.emit('def __init__(self):')
+        self.indent += 1
+        # the initializers run in a frame of their own, later fields
+        # seeing earlier ones, which literals after the last other
+        # initializer need not be kept in
+        self.frames.append(struct_decl)
+        literals = 0
+        while literals < len(fields) and resolver.literal(struct_decl.var_decls[-literals - 1].var_expr):
+            literals += 1
+        for i, (var_decl, field) in enumerate(zip(struct_decl.var_decls, fields)):
+            if i >= len(fields) - literals:
+                self.emit('self.%s = %s' % (field, self.__expr(var_decl.var_expr)))
+            else:
+                var_decl.accept(self)
+                self.emit('self.%s = %s' % (field, self.__name(0, var_decl.slot, var_decl.var_id.lexeme)))
+        if not fields:
+            self.emit('pass')
+        self.frames.pop()
+        self.indent -= 2
+
+    def visit_fun_decl_stmt(self, fun_decl):
+        name = self.__name(0, fun_decl.slot, fun_decl.fun_name.lexeme)
+        self.frames.append(fun_decl)
+        params = [self.__name(0, x.slot, x.param_name.lexeme) for x in fun_decl.params]
+        lines = self.lines
+        self.lines = []
+        self.outer_stores = set()
+        self.function = fun_decl
+        self.self_tail_calls = False
+        self.again = None
+        self.__block(fun_decl.stmt_list)
+        self.function = None
+        body = self.lines
+        self.lines = lines
+        self.frames.pop()
+        # a body running off its end returns None: nil, as in every engine
+        self.emit('def %s(%s):' % (name, ', '.join(params)))
+        self.indent += 1
+        if self.outer_stores:
+            self.emit('nonlocal ' + ', '.join(sorted(self.outer_stores)))
+        if self.self_tail_calls:
+            self.emit('while True:')
+            body = ['    ' + line for line in body]
+            if self.again is not None:
+                body.insert(0, '    ' * (self.indent + 1) + self.again + ' = False')
+            end = '    ' * (self.indent + 1)
+            if body[-1] not in (end + 'return', end + 'continue') and not body[-1].startswith(end + 'return '):
+                body.append(end + 'return')
+        self.indent -= 1
+        self.lines.extend(body)
+
+    def visit_return_stmt(self, return_stmt):
+        if return_stmt.tail_call:
+            call_rvalue = return_stmt.return_expr.term
+            if call_rvalue.depth == 1 and call_rvalue.slot == self.function.slot:
+                # run the body again with the new arguments
+                params = [self.__name(0, x.slot, x.param_name.lexeme) for x in self.function.params]
+                args = [self.__expr(x) for x in call_rvalue.args]
+                if params:
+                    self.emit('%s = %s' % (', '.join(params), ', '.join(args)))
+                if self.loops:
+                    if self.again is None:
+                        self.again = self.__unique('again')
+                    self.emit(self.again + ' = True')
+                    self.emit('break')
+                    self.breaks += 1
+                else:
+                    self.emit('continue')
+                self.self_tail_calls = True
+                return
+        if return_stmt.return_expr != None:
+            self.emit('return ' + self.__expr(return_stmt.return_expr))
+        else:
+            self.emit('return')
+
+    def visit_while_stmt(self, while_stmt):
+        self.emit('while %s:' % self.__expr(while_stmt.bool_expr))
+        self.loops += 1
+        breaks = self.breaks
+        self.__block(while_stmt.stmt_list)
+        self.loops -= 1
+        if self.breaks > breaks:
+            # a tail call to the function broke out of the loop
+            self.emit('if %s:' % self.again)
+            self.indent += 1
+            self.emit('break' if self.loops else 'continue')
+            self.indent -= 1
+
+    def visit_if_stmt(self, if_stmt):
+        self.emit('if %s:' % self.__expr(if_stmt.if_part.bool_expr))
+        self.__block(if_stmt.if_part.stmt_list)
+        for basic_if in if_stmt.elseifs:
+            self.emit('elif %s:' % self.__expr(basic_if.bool_expr))
+            self.__block(basic_if.stmt_list)
+        if if_stmt.has_else:
+            self.emit('else:')
+            self.__block(if_stmt.else_stmts)
+
+    def visit_simple_expr(self, simple_expr):
+        simple_expr.term.accept(self)
+
+    def visit_complex_expr(self, complex_expr):
+        # a - b - c is a - (b - c)
+        operands = []
+        while isinstance(complex_expr, ast.ComplexExpr):
+            operands.append((self.__expr(complex_expr.first_operand), operators.SYMBOLS[complex_expr.op]))
+            complex_expr = complex_expr.rest
+        source = self.__expr(complex_expr)
+        for operand, op in reversed(operands):
+            source = '(%s %s %s)' % (operand, op, source)
+        self.source = source
+
+    def visit_bool_expr(self, bool_expr):
+        terms = []
+        while True:
+            lhs = self.__expr(bool_expr.first_expr)
+            if bool_expr.bool_rel != None:
+                term = '(%s %s %s)' % (lhs, operators.SYMBOLS[bool_expr.op], self.__expr(bool_expr.second_expr))
+            else:
+                term = '(%s == True)' % lhs
+            if bool_expr.negated:
+                term = '(not %s)' % term
+            if bool_expr.bool_connector == None:
+                break
+            op = bool_expr.bool_connector.lexeme
+            if self.eager:
+                op = '&' if op == 'and' else '|'
+            terms.append((term, op))
+            bool_expr = bool_expr.rest
+        for lhs, op in reversed(terms):
+            term = '(%s %s %s)' % (lhs, op, term)
+        self.source = term
+
+    def visit_simple_rvalue(self, simple_rvalue):
+        if simple_rvalue.const is not None:
+            self.source = repr(self.literals[simple_rvalue.const])
+        elif simple_rvalue.slot is None:
+            self.source = 'None'
+        else:
+            self.source = self.__name(simple_rvalue.depth, simple_rvalue.slot, simple_rvalue.val.lexeme)
+
+    def visit_new_rvalue(self, new_rvalue):
+        if new_rvalue.slot is None:
+            self.source = 'None()'
+        else:
+            self.source = self.__name(new_rvalue.depth, new_rvalue.slot, new_rvalue.struct_type.lexeme) + '()'
+
+    def visit_call_rvalue(self, call_rvalue):
+        args = [self.__expr(x) for x in call_rvalue.args]
+        name = call_rvalue.fun.lexeme
+        built_in = mypl_builtins.BUILT_INS.get(name)
+        if built_in is not None:
+            self.built_ins.add(name)
+            if built_in.located:
+                the_token = resolver.error_token(call_rvalue)
+                args += [str(the_token.line), str(the_token.column)]
+            self.source = '%s(%s)' % (built_in_name(name), ', '.join(args))
+        elif call_rvalue.slot is None:
+            self.source = 'None(%s)' % ', '.join(args)
+        else:
+            self.source = '%s(%s)' % (self.__name(call_rvalue.depth, call_rvalue.slot, name), ', '.join(args))
+
+    def visit_id_rvalue(self, id_rvalue):
+        if id_rvalue.slot is None:
+            source = 'None'
+        else:
+            source = self.__name(id_rvalue.depth, id_rvalue.slot, id_rvalue.path[0].lexeme)
+        self.source = source + ''.join('.' + self.__field(x.lexeme) for x in id_rvalue.path[1:])
+
+
+def transpile(stmt_list, eager=False):
+    """Returns the source of a Python module running the checked program
+    stmt_list, evaluating both sides of and/or if eager"""
+    resolver.resolve(stmt_list)
+    return Transpiler(eager).transpile(stmt_list)
+
+class TranspilingInterpreter(object):
+    """Runs a program by transpiling it to Python and running that. The
+    generated classes are not runtime.Structs, so heap_stats only counts
+    garbage collections."""
+
+    def __init__(self, eager=False):
+        self.eager = eager
+        # garbage collection counters
+        self.heap_stats = runtime.HeapStats()
+
+    def run(self, stmt_list):
+        namespace = {'__name__': 'mypl_program'}
+        exec(compile(transpile(stmt_list, self.eager), '<mypl>', 'exec'), namespace)
+        self.heap_stats.scalar_replaced_sites = stmt_list.scalar_replaced_sites
+        with self.heap_stats:
+            namespace['_program']()
@@ -0,0 +1,201 @@
+import mypl_bytecode as bytecode
+import mypl_runtime as runtime
+from mypl_bytecode import (CONST, LOAD, STORE, LOAD_OUTER, STORE_OUTER, LOAD_FAR,
+                           STORE_FAR, POP, GET_FIELD, SET_FIELD, ADD, SUB, MUL, DIV,
+                           IDIV, MOD, LT, LE, GT, GE, EQ, NE, TRUTH, NOT, AND, OR, JUMP,
+                           JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP,
+                           CLEAR, CALL, TAIL_CALL, BUILTIN, RETURN, MAKE_CLOSURE, MAKE_STRUCT,
+                           NEW)
+
+class VM(object):
+    """Runs a program compiled by mypl_bytecode. Values are kept on one
+    explicit stack, and a call saves the caller's code, position and frame
+    on a call stack instead of recursing, so deep MyPL recursion uses no
+    Python stack. A tail call replaces the returning function's code and
+    frame instead, so tail recursion does not grow the call stack either.
+    Frames are lists laid out as the resolver describes, the values of
+    function and struct declarations are (frame, Code) pairs, and structs
+    are runtime.Structs."""
+
+    def __init__(self, eager=False):
+        # whether both sides of and/or are always evaluated
+        self.eager = eager
+        # struct allocation and garbage collection counters
+        self.heap_stats = runtime.HeapStats()
+
+    def run(self, stmt_list):
+        code = bytecode.compile(stmt_list, self.eager)
+        self.heap_stats.scalar_replaced_sites = stmt_list.scalar_replaced_sites
+        with self.heap_stats:
+            self.execute(code)
+
+    def execute(self, code):
+        Struct = runtime.Struct
+        allocate = self.heap_stats.allocate
+        frame = [None] * code.frame_size
+        ops, args, constants = code.ops, code.args, code.constants
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # (code, position, frame) of each caller
+        calls = []
+        pc = 0
+        while True:
+            op = ops[pc]
+            arg = args[pc]
+            pc += 1
+            if op == LOAD:
+                push(frame[arg])
+            elif op == CONST:
+                push(constants[arg])
+            elif op == STORE:
+                frame[arg] = pop()
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == ADD:
+                rhs = pop()
+                stack[-1] = stack[-1] + rhs
+            elif op == SUB:
+                rhs = pop()
+                stack[-1] = stack[-1] - rhs
+            elif op == MUL:
+                rhs = pop()
+                stack[-1] = stack[-1] * rhs
+            elif op == DIV:
+                rhs = pop()
+                stack[-1] = stack[-1] / rhs
+            elif op == IDIV:
+                rhs = pop()
+                stack[-1] = stack[-1] // rhs
+            elif op == MOD:
+                rhs = pop()
+                stack[-1] = stack[-1] % rhs
+            elif op == LT:
+                rhs = pop()
+                stack[-1] = stack[-1] < rhs
+            elif op == LE:
+                rhs = pop()
+                stack[-1] = stack[-1] <= rhs
+            elif op == GT:
+                rhs = pop()
+                stack[-1] = stack[-1] > rhs
+            elif op == GE:
+                rhs = pop()
+                stack[-1] = stack[-1] >= rhs
+            elif op == EQ:
+                rhs = pop()
+                stack[-1] = stack[-1] == rhs
+            elif op == NE:
+                rhs = pop()
+                stack[-1] = stack[-1] != rhs
+            elif op == LOAD_OUTER:
+                push(frame[0][arg])
+            elif op == STORE_OUTER:
+                frame[0][arg] = pop()
+            elif op == POP:
+                pop()
+            elif op == TRUTH:
+                stack[-1] = stack[-1] == True
+            elif op == NOT:
+                stack[-1] = not stack[-1]
+            elif op == AND:
+                rhs = pop()
+                stack[-1] = stack[-1] and rhs
+            elif op == OR:
+                rhs = pop()
+                stack[-1] = stack[-1] or rhs
+            elif op == JUMP_IF_FALSE_OR_POP:
+                if stack[-1]:
+                    pop()
+                else:
+                    pc = arg
+            elif op == JUMP_IF_TRUE_OR_POP:
+                if stack[-1]:
+                    pc = arg
+                else:
+                    pop()
+            elif op == CLEAR:
+                start, end, nones = constants[arg]
+                frame[start:end] = nones
+            elif op == GET_FIELD:
+                stack[-1] = stack[-1][arg]
+            elif op == SET_FIELD:
+                struct_obj = pop()
+                struct_obj[arg] = pop()
+            elif op == CALL:
+                fun_frame, callee = stack[-arg - 1]
+                # a new frame linked to the one the function was declared in
+                new_frame = [fun_frame] + [None] * (callee.frame_size - 1)
+                if arg:
+                    for slot, value in zip(callee.params, stack[-arg:]):
+                        new_frame[slot] = value
+                del stack[-arg - 1:]
+                calls.append((code, pc, frame))
+                code = callee
+                ops, args, constants = code.ops, code.args, code.constants
+                frame = new_frame
+                pc = 0
+            elif op == TAIL_CALL:
+                fun_frame, callee = stack[-arg - 1]
+                new_frame = [fun_frame] + [None] * (callee.frame_size - 1)
+                if arg:
+                    for slot, value in zip(callee.params, stack[-arg:]):
+                        new_frame[slot] = value
+                del stack[-arg - 1:]
+                # the callee returns to this function's caller
+                code = callee
+                ops, args, constants = code.ops, code.args, code.constants
+                frame = new_frame
+                pc = 0
+            elif op == RETURN:
+                if not calls:
+                    return
+                value = pop()
+                code, pc, frame = calls.pop()
+                ops, args, constants = code.ops, code.args, code.constants
+                push(value)
+            elif op == BUILTIN:
+                name, count, function, extra = constants[arg]
+                if count:
+                    values = stack[-count:]
+                    del stack[-count:]
+                else:
+                    values = []
+                push(function(*values, *extra))
+            elif op == MAKE_CLOSURE:
+                push((frame, constants[arg]))
+            elif op == NEW:
+                struct_frame, callee = pop()
+                values, template = callee.template
+                if callee.ops:
+                    # run the other initializers in a copy of the template's frame
+                    new_frame = list(template)
+                    new_frame[0] = struct_frame
+                    calls.append((code, pc, frame))
+                    code = callee
+                    ops, args, constants = code.ops, code.args, code.constants
+                    frame = new_frame
+                    pc = 0
+                else:
+                    push(allocate(Struct(values)))
+            elif op == MAKE_STRUCT:
+                struct_obj = Struct(code.template[0])
+                for i, slot in constants[arg]:
+                    struct_obj[i] = frame[slot]
+                push(allocate(struct_obj))
+            elif op == LOAD_FAR:
+                depth, slot = constants[arg]
+                push(_frame(frame, depth)[slot])
+            elif op == STORE_FAR:
+                depth, slot = constants[arg]
+                _frame(frame, depth)[slot] = pop()
+
+
+def _frame(frame, depth):
+    while depth:
+        frame = frame[0]
+        depth -= 1
+    return frame